@@ -0,0 +1,105 @@
+"""
+Evolve against a remote scorer with an async fitness function, and time how much concurrent evaluation helps.
+
+A stub scoring service is started on a local TCP port: it reads a chromosome as a line of 0s and 1s,
+waits a fixed latency to stand in for a slow remote simulation, and replies with its knapsack score.
+The same simulation is then run with async_concurrency 1 and with a higher limit.
+
+Run with:
+    python AsyncExample.py
+    python AsyncExample.py --latency 0.01 --concurrency 50 --generations 10
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+from Genetic import Population, BreakCondition
+from ExampleUsage import ExampleProblems
+
+
+async def start_stub_scorer(score_function, latency, host="127.0.0.1", port=0):
+    """Start a TCP server scoring one chromosome per line after a delay, and return it with its port"""
+    async def handle(reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                await asyncio.sleep(latency)
+                writer.write("{}\n".format(score_function([int(bit) for bit in line.strip().decode()])).encode())
+                await writer.drain()
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    return server, server.sockets[0].getsockname()[1]
+
+
+def make_remote_fitness(host, port):
+    """Return an async fitness function that sends each chromosome to the scorer over its own connection"""
+    async def remote_fitness(chromosome):
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            writer.write("{}\n".format("".join(str(bit) for bit in chromosome)).encode())
+            await writer.drain()
+            return float(await reader.readline())
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+    return remote_fitness
+
+
+async def time_simulation(fitness_function, chromosomes, generations, concurrency):
+    """Run simulate_async from the given chromosomes and return the seconds taken and the best fitness"""
+    pop = Population(seed=1)
+    pop.chromosomes = chromosomes
+    pop.fitness_function = fitness_function
+    pop.async_concurrency = concurrency
+    pop.set_break_condition(BreakCondition.GENERATION, generations)
+    start = time.perf_counter()
+    max_fitnesses, avg_fitnesses = await pop.simulate_async(echo=False, plot=False)
+    return time.perf_counter() - start, max_fitnesses[-1]
+
+
+async def run(latency, concurrency, generations, population_size, chromosome_length):
+    problems = ExampleProblems(chromosome_length, seed=1)
+    server, port = await start_stub_scorer(problems.knapsack, latency)
+    try:
+        fitness_function = make_remote_fitness("127.0.0.1", port)
+        chromosomes = list(Population(seed=1).generate_random_sample(population_size, chromosome_length))
+        serial_seconds, serial_best = await time_simulation(fitness_function, chromosomes, generations, 1)
+        concurrent_seconds, concurrent_best = await time_simulation(fitness_function, chromosomes, generations,
+                                                                    concurrency)
+    finally:
+        server.close()
+        await server.wait_closed()
+
+    print("async_concurrency 1:\t{:.2f}s\tbest fitness {}".format(serial_seconds, serial_best))
+    print("async_concurrency {}:\t{:.2f}s\tbest fitness {}".format(concurrency, concurrent_seconds, concurrent_best))
+    print("Speed up: {:.1f}x".format(serial_seconds / concurrent_seconds))
+    # The fitness function is deterministic, so the runs must only differ in how long they took
+    if serial_best != concurrent_best:
+        print("The concurrent run found a different best fitness.", file=sys.stderr)
+        return 1
+    if concurrent_seconds >= serial_seconds:
+        print("Concurrent evaluation was not faster.", file=sys.stderr)
+        return 1
+    return 0
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Time an async fitness function against a local stub scorer.")
+    parser.add_argument("--latency", type=float, default=0.005, help="Seconds the stub takes to score a chromosome.")
+    parser.add_argument("--concurrency", type=int, default=20, help="async_concurrency of the concurrent run.")
+    parser.add_argument("--generations", type=int, default=5)
+    parser.add_argument("--population-size", type=int, default=40)
+    parser.add_argument("--chromosome-length", type=int, default=50)
+    arguments = parser.parse_args(arguments)
+    return asyncio.run(run(arguments.latency, arguments.concurrency, arguments.generations,
+                           arguments.population_size, arguments.chromosome_length))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
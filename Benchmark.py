@@ -0,0 +1,285 @@
+"""
+Timings for the genetic algorithm's operators, fitness functions and problem decoding.
+
+Run with:
+    python Benchmark.py                               # every suite
+    python Benchmark.py --suite next_generation --quick
+    python Benchmark.py --output baseline.json        # save the results as JSON
+    python Benchmark.py --compare baseline.json       # report anything slower than the baseline
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import timeit
+from enum import Enum
+
+from Genetic import Population, SelectionMethod, CrossoverMethod
+from PackedGenetic import PackedPopulation
+from ExampleUsage import ExampleProblems
+from Problem import Problem
+
+# Result fields that are measurements; every other field identifies the benchmark
+MEASUREMENTS = ("seconds", "evaluations")
+
+
+def time_call(function, repeat=3):
+    """
+    Return the best wall clock time, in seconds, of a single call of a function.
+    Each of the repeats calls it in a loop of at least 0.2 seconds, as timeit's autorange picks,
+    so that calls of a few microseconds are not lost in the timer's resolution and noise.
+    """
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def _legacy_tournament_selection(population, num_to_select=2):
+    """The original tournament selection: 2 contestants, both re-scored for every draw"""
+    for c in range(0, num_to_select):
+        chr1 = random.choice(population.chromosomes)
+        chr2 = random.choice(population.chromosomes)
+        if population.fitness_function(chr1) >= population.fitness_function(chr2):
+            yield chr1
+        else:
+            yield chr2
+
+
+def benchmark_tournament_selection(population_sizes=(1000, 10000, 100000), chromosome_length=32,
+                                   tournament_sizes=(2, 4, 8), repeat=3):
+    """
+    Time drawing a whole generation's worth of parents with tournament selection.
+    The legacy implementation draws a pair at a time, re-scoring both contestants,
+    while the current implementations draw every parent in one batch over the fitness table.
+    """
+    from NumpyGenetic import NumpyPopulation
+
+    results = []
+    for population_size in population_sizes:
+        sample = list(Population().generate_random_sample(population_size, chromosome_length))
+
+        legacy = Population()
+        legacy.chromosomes = sample
+        legacy.fitness_function = sum
+
+        def legacy_generation():
+            for i in range(0, population_size//2):
+                list(_legacy_tournament_selection(legacy, 2))
+        results.append({"benchmark": "tournament_selection", "implementation": "legacy", "population_size": population_size, "tournament_size": 2,
+                        "seconds": time_call(legacy_generation, repeat), "evaluations": 2 * population_size})
+
+        for population_class in (Population, NumpyPopulation):
+            for tournament_size in tournament_sizes:
+                for replacement in (True, False):
+                    pop = population_class()
+                    pop.chromosomes = sample
+                    pop.fitness_function = sum
+                    pop.tournament_size = tournament_size
+                    pop.tournament_replacement = replacement
+
+                    def batched_generation():
+                        pop._clear_fitness_table()  # Re-score the population, as a new generation would
+                        list(pop._selection_methods[SelectionMethod.TOURNAMENT](population_size))
+                    seconds = time_call(batched_generation, repeat)
+                    results.append({"benchmark": "tournament_selection",
+                                    "implementation": "{}{}".format(population_class.__name__,
+                                                                    "" if replacement else " (no replacement)"),
+                                    "population_size": population_size, "tournament_size": tournament_size,
+                                    "seconds": seconds, "evaluations": pop.generation_evaluations // repeat})
+    return results
+
+
+def _population_classes():
+    """Return every population implementation that can be imported here"""
+    population_classes = [Population, PackedPopulation]
+    try:
+        from NumpyGenetic import NumpyPopulation
+        population_classes.append(NumpyPopulation)
+    except ImportError:
+        pass
+    return population_classes
+
+
+def benchmark_next_generation(population_sizes=(100, 1000), chromosome_lengths=(32, 256), repeat=3,
+                              population_classes=None):
+    """
+    Time Population.next_generation for every selection x crossover method, population size and chromosome length.
+    The fitness function is sum, so the time is mostly spent in the operators rather than in evaluation.
+    """
+    results = []
+    for population_class in population_classes or _population_classes():
+        for population_size in population_sizes:
+            for chromosome_length in chromosome_lengths:
+                sample = list(Population(seed=0).generate_random_sample(population_size, chromosome_length))
+                for selection_method in SelectionMethod:
+                    for crossover_method in CrossoverMethod:
+                        pop = population_class(seed=0)
+                        pop.chromosomes = sample
+                        pop.fitness_function = sum
+                        pop.selection_method = selection_method
+                        pop.crossover_method = crossover_method
+                        results.append({"benchmark": "next_generation", "implementation": population_class.__name__,
+                                        "selection_method": selection_method.value,
+                                        "crossover_method": crossover_method.value,
+                                        "population_size": population_size, "chromosome_length": chromosome_length,
+                                        "seconds": time_call(pop.next_generation, repeat)})
+    return results
+
+
+def benchmark_fitness_functions(number_of_chromosomes=200, chromosome_length=500, repeat=3):
+    """Time scoring a population with each ExampleProblems fitness function, and each batch version"""
+    problems = ExampleProblems(chromosome_length, seed=0)
+    chromosomes = list(Population(seed=0).generate_random_sample(number_of_chromosomes, chromosome_length))
+    results = []
+    for name, fitness_function in problems.problems.items():
+        results.append({"benchmark": "fitness_function", "problem": name, "batch": False,
+                        "number_of_chromosomes": number_of_chromosomes, "chromosome_length": chromosome_length,
+                        "seconds": time_call(lambda: [fitness_function(chromosome) for chromosome in chromosomes], repeat)})
+    try:
+        import numpy as np
+    except ImportError:
+        return results
+    chromosome_array = np.array(chromosomes, dtype=np.uint8)
+    for name, fitness_function in problems.batch_problems.items():
+        results.append({"benchmark": "fitness_function", "problem": name, "batch": True,
+                        "number_of_chromosomes": number_of_chromosomes, "chromosome_length": chromosome_length,
+                        "seconds": time_call(lambda: fitness_function(chromosome_array), repeat)})
+    return results
+
+
+def benchmark_problem_decoding(number_of_chromosomes=1000, repeat=3):
+    """Time the Problem decoding helpers over a population of encoded parameter choices"""
+    problem = Problem()
+    problem.add_parameter("angle", range(0, 181))
+    problem.add_parameter("power", range(0, 101))
+    angle_length = len(problem.get_bitlist("angle"))
+    chromosomes = list(Population(seed=0).generate_random_sample(number_of_chromosomes, len(problem.get_bitlist())))
+
+    def decode_all():
+        for chromosome in chromosomes:
+            problem.get_parameter_value("angle", chromosome[:angle_length])
+            problem.get_parameter_value("power", chromosome[angle_length:])
+
+    results = []
+    for helper, function in (("bitlist_to_int", lambda: [problem.bitlist_to_int(chromosome) for chromosome in chromosomes]),
+                             ("get_parameter_value", decode_all),
+                             ("get_bitlist", lambda: [problem.get_bitlist() for chromosome in chromosomes]),
+                             ("decode", lambda: [problem.decode(chromosome) for chromosome in chromosomes])):
+        results.append({"benchmark": "problem_decoding", "helper": helper, "number_of_chromosomes": number_of_chromosomes,
+                        "seconds": time_call(function, repeat)})
+    return results
+
+
+SUITES = {
+    "tournament_selection": benchmark_tournament_selection,
+    "next_generation": benchmark_next_generation,
+    "fitness_function": benchmark_fitness_functions,
+    "problem_decoding": benchmark_problem_decoding,
+}
+
+# Smaller settings for each suite, for a quick check rather than a careful measurement
+QUICK_SETTINGS = {
+    "tournament_selection": {"population_sizes": (1000,), "tournament_sizes": (2, 8), "repeat": 1},
+    "next_generation": {"population_sizes": (100,), "chromosome_lengths": (32,), "repeat": 1},
+    "fitness_function": {"number_of_chromosomes": 50, "repeat": 1},
+    "problem_decoding": {"number_of_chromosomes": 200, "repeat": 1},
+}
+
+
+def run_suites(suite_names=None, quick=False):
+    """Run the named benchmark suites (by default all of them) and return every result"""
+    results = []
+    for suite_name in suite_names or SUITES:
+        results.extend(SUITES[suite_name](**(QUICK_SETTINGS[suite_name] if quick else {})))
+    return results
+
+
+def _benchmark_key(result):
+    """Return the fields of a result that identify what was measured, as a hashable key"""
+    return tuple(sorted((name, value) for name, value in result.items() if name not in MEASUREMENTS))
+
+
+def write_results(results, path):
+    """Write results to a JSON file, along with the Python version and machine they were measured on"""
+    results = [{name: value.value if isinstance(value, Enum) else value for name, value in result.items()}
+               for result in results]
+    with open(path, "w") as results_file:
+        json.dump({"python": platform.python_version(), "machine": platform.machine(),
+                   "processor": platform.processor(), "results": results}, results_file, indent=1)
+
+
+def read_results(path):
+    with open(path) as results_file:
+        return json.load(results_file)["results"]
+
+
+def compare_results(baseline, results, tolerance=0.1):
+    """
+    Match each result to the baseline result of the same benchmark and return a comparison for each,
+    with the ratio of the new time to the baseline time and whether it is more than tolerance slower.
+    Results with no baseline counterpart are left out, so callers should check how many matched.
+    """
+    baseline_seconds = {_benchmark_key(result): result["seconds"] for result in baseline}
+    comparisons = []
+    for result in results:
+        key = _benchmark_key(result)
+        if key not in baseline_seconds:
+            continue
+        ratio = result["seconds"] / baseline_seconds[key] if baseline_seconds[key] else float("inf")
+        comparison = dict(result)
+        comparison.update({"baseline_seconds": baseline_seconds[key], "ratio": ratio,
+                           "regression": ratio > 1 + tolerance})
+        comparisons.append(comparison)
+    return comparisons
+
+
+def _describe(result):
+    return "\t".join("{}={}".format(name, value.value if isinstance(value, Enum) else value)
+                     for name, value in result.items()
+                     if name not in MEASUREMENTS + ("baseline_seconds", "ratio", "regression"))
+
+
+def print_results(results):
+    for result in results:
+        print("{}\t{:.4f}s".format(_describe(result), result["seconds"]))
+
+
+def print_comparison(comparisons):
+    for comparison in comparisons:
+        print("{}\t{:.4f}s -> {:.4f}s\t{:.2f}x{}".format(_describe(comparison), comparison["baseline_seconds"],
+                                                      comparison["seconds"], comparison["ratio"],
+                                                      "\tREGRESSION" if comparison["regression"] else ""))
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Benchmark the genetic algorithm.")
+    parser.add_argument("--suite", action="append", choices=list(SUITES),
+                        help="Suite to run; may be given more than once. Defaults to every suite.")
+    parser.add_argument("--quick", action="store_true", help="Run smaller, single repeat benchmarks.")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument("--compare", help="Compare the results with those in this JSON file.")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="Fraction slower than the baseline that counts as a regression.")
+    arguments = parser.parse_args(arguments)
+
+    results = run_suites(arguments.suite, arguments.quick)
+    if arguments.output:
+        write_results(results, arguments.output)
+    if not arguments.compare:
+        print_results(results)
+        return 0
+    comparisons = compare_results(read_results(arguments.compare), results, arguments.tolerance)
+    if not comparisons:
+        print("No results match the baseline {}; was it run with other suites or --quick settings?"
+              .format(arguments.compare), file=sys.stderr)
+        return 2
+    if len(comparisons) < len(results):
+        print("Warning: {} of {} results have no baseline to compare with."
+              .format(len(results) - len(comparisons), len(results)), file=sys.stderr)
+    print_comparison(comparisons)
+    return 1 if any(comparison["regression"] for comparison in comparisons) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,42 +1,105 @@
-from Genetic import Population, SelectionMethod, CrossoverMethod, BreakCondition
+from Genetic import Population, SelectionMethod, CrossoverMethod, BreakCondition, batch_fitness, bits_to_int
 import math
 import random
+from array import array
 
 
 class ExampleProblems():
     """Object containing some example problems for the genetic algorithm."""
 
-    def __init__(self, number_of_items=500):
+    def __init__(self, number_of_items=500, seed=None):
+        self._random = random.Random(seed)
         self.knapsack_items = self._randomise_knapsack_items(number_of_items)
         self.knapsack_allowance = number_of_items * 30
-
-        self.problems = {"none": lambda c: 1,
-                         "knapsack": lambda c: self.knapsack(c),
-                         "1010": lambda c: self.alternating_ones_and_zeroes(c),
-                         "1111": lambda c: self.list_of_ones(c),
-                         "weird_factors": lambda c: self.weird_factors(c),
-                         "shops": lambda c: self.shop_problem(c),
-                         "furthest_cannonball": lambda c: self.furthest_cannonball(c),
-
-
+        self._set_knapsack_arrays()
+
+        self._set_problem_tables()
+
+    def _set_problem_tables(self):
+        # Bound methods rather than lambdas, so that problems can be pickled
+        # and sent to worker processes for parallel evaluation.
+        self.problems = {"none": self.no_problem,
+                         "knapsack": self.knapsack,
+                         "knapsack_repaired": self.knapsack_repaired,
+                         "1010": self.alternating_ones_and_zeroes,
+                         "1111": self.list_of_ones,
+                         "weird_factors": self.weird_factors,
+                         "shops": self.shop_problem,
+                         "furthest_cannonball": self.furthest_cannonball,
                          }
 
+        # Vectorised versions of the problems above, which score a whole population at once.
+        # These require numpy.
+        self.batch_problems = {"knapsack": self.knapsack_batch,
+                               "knapsack_repaired": self.knapsack_repaired_batch,
+                               "1010": self.alternating_ones_and_zeroes_batch,
+                               "1111": self.list_of_ones_batch,
+                               }
+
+        # Incremental versions of the problems above, which update a parent's fitness
+        # for the bits that changed. See Population.fitness_delta_function.
+        self.delta_problems = {"1010": self.alternating_ones_and_zeroes_delta,
+                               "1111": self.list_of_ones_delta,
+                               }
+
+        # Operators that make a chromosome feasible for a problem. See Population.repair_function.
+        self.repair_operators = {"knapsack": self.knapsack_repair,
+                                 }
+
+    def __getstate__(self):
+        """Pickle only the problem data; the problem tables refer back to this object and are rebuilt"""
+        state = self.__dict__.copy()
+        del state["problems"]
+        del state["batch_problems"]
+        del state["delta_problems"]
+        del state["repair_operators"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._set_problem_tables()
+
     def _get_problems(self):
         return [problem_name for problem_name in self.problems]
 
     problem_names = property(_get_problems)
 
+    def _set_knapsack_arrays(self):
+        """
+        Store the knapsack item values and weights in contiguous arrays, along with the item indices
+        in order of value/weight ratio, best first, for the greedy repair operator.
+        """
+        self.knapsack_values = array("l", [item["value"] for item in self.knapsack_items])
+        self.knapsack_weights = array("l", [item["weight"] for item in self.knapsack_items])
+        self.knapsack_ratios = array("d", [value / weight if weight else math.inf
+                                           for value, weight in zip(self.knapsack_values, self.knapsack_weights)])
+        self._knapsack_order = sorted(range(0, len(self.knapsack_items)), key=lambda index: -self.knapsack_ratios[index])
+        self._knapsack_numpy_arrays = None
+
+    def _get_knapsack_numpy_arrays(self):
+        """Return the values, weights and ratio order as numpy arrays, made once and kept"""
+        import numpy as np
+        if self._knapsack_numpy_arrays is None:
+            self._knapsack_numpy_arrays = (np.asarray(self.knapsack_values, dtype=np.int64),
+                                           np.asarray(self.knapsack_weights, dtype=np.int64),
+                                           np.asarray(self._knapsack_order, dtype=np.int64))
+        return self._knapsack_numpy_arrays
+
     def _randomise_knapsack_items(self, number_of_values=10):
         """Generate items for knapsack problem with random values/weights"""
         items = []
         # print("-\tValue\tWeight")
         for i in range(0, number_of_values):
-            value = random.randrange(0, 100)
-            weight = random.randrange(0, 100)
+            value = self._random.randrange(0, 100)
+            weight = self._random.randrange(0, 100)
             items.append({"value": value, "weight": weight})
             #print("Item {}:\t{}\t{}".format(i, value, weight))
         return items
 
+    def no_problem(self, chromosome):
+        """Every chromosome is equally fit."""
+        return 1
+
     def alternating_ones_and_zeroes(self, chromosome):
         """
         A problem where we want a string to contain alternating 0s and 1s.
@@ -50,6 +113,25 @@ class ExampleProblems():
                 fitness += c
         return fitness
 
+    @batch_fitness
+    def alternating_ones_and_zeroes_batch(self, chromosomes):
+        """Score a whole population for alternating_ones_and_zeroes in one matrix operation"""
+        import numpy as np
+        chromosomes = np.asarray(chromosomes, dtype=np.int64)
+        signs = np.where(np.arange(chromosomes.shape[1]) % 2 == 0, -1, 1)
+        return chromosomes @ signs
+
+    def alternating_ones_and_zeroes_delta(self, parent_fitness, changed_indices, chromosome):
+        """Update alternating_ones_and_zeroes fitness from a parent's fitness, given the bits that changed"""
+        if parent_fitness <= 0:
+            # Negative fitnesses are stored as 0, so the parent's real fitness is unknown
+            return None
+        fitness = parent_fitness
+        for index in changed_indices:
+            sign = -1 if index % 2 == 0 else 1
+            fitness += sign if chromosome[index] else -sign
+        return fitness
+
     def list_of_ones(self, chromosome):
         """
         A problem where we want to have a string containing as many 1s as
@@ -61,6 +143,16 @@ class ExampleProblems():
             fitness += i
         return fitness
 
+    @batch_fitness
+    def list_of_ones_batch(self, chromosomes):
+        """Score a whole population for list_of_ones in one matrix operation"""
+        import numpy as np
+        return np.asarray(chromosomes, dtype=np.int64).sum(axis=1)
+
+    def list_of_ones_delta(self, parent_fitness, changed_indices, chromosome):
+        """Update list_of_ones fitness from a parent's fitness, given the bits that changed"""
+        return parent_fitness + sum(1 if chromosome[index] else -1 for index in changed_indices)
+
     def weird_factors(self, chromosome):
         """
         A somewhat random problem.
@@ -135,13 +227,67 @@ class ExampleProblems():
     def knapsack(self, chromosome):
         weight = 0
         value = 0
-        for item, pickup in zip(self.knapsack_items, chromosome):
-            value += item["value"] * pickup
-            weight += item["weight"] * pickup
-            if weight > self.knapsack_allowance:
-                return 0
+        for item_value, item_weight, pickup in zip(self.knapsack_values, self.knapsack_weights, chromosome):
+            if pickup:
+                value += item_value
+                weight += item_weight
+                if weight > self.knapsack_allowance:
+                    return 0
         return value
 
+    @batch_fitness
+    def knapsack_batch(self, chromosomes):
+        """Score a whole population for the knapsack problem in one matrix operation"""
+        import numpy as np
+        item_values, item_weights, order = self._get_knapsack_numpy_arrays()
+        chromosomes = np.asarray(chromosomes, dtype=np.int64)[:, :len(item_values)]
+        values = chromosomes @ item_values[:chromosomes.shape[1]]
+        weights = chromosomes @ item_weights[:chromosomes.shape[1]]
+        return np.where(weights > self.knapsack_allowance, 0, values)
+
+    def knapsack_repair(self, chromosome):
+        """
+        Return a feasible copy of a knapsack chromosome: while it is over the allowance, drop the picked
+        item with the lowest value/weight ratio, then pick every unpicked item, best ratio first, that still fits.
+        """
+        repaired = list(chromosome)
+        order = [index for index in self._knapsack_order if index < len(repaired)]
+        weight = sum(item_weight for item_weight, pickup in zip(self.knapsack_weights, repaired) if pickup)
+        for index in reversed(order):
+            if weight <= self.knapsack_allowance:
+                break
+            if repaired[index]:
+                repaired[index] = 0
+                weight -= self.knapsack_weights[index]
+        for index in order:
+            if not repaired[index] and weight + self.knapsack_weights[index] <= self.knapsack_allowance:
+                repaired[index] = 1
+                weight += self.knapsack_weights[index]
+        return repaired
+
+    def knapsack_repaired(self, chromosome):
+        """Score the knapsack problem for the repaired version of a chromosome, so every chromosome is feasible"""
+        return self.knapsack(self.knapsack_repair(chromosome))
+
+    @batch_fitness
+    def knapsack_repaired_batch(self, chromosomes):
+        """Score a whole population for knapsack_repaired, repairing every row at once"""
+        import numpy as np
+        item_values, item_weights, order = self._get_knapsack_numpy_arrays()
+        chromosomes = np.asarray(chromosomes, dtype=np.int64)[:, :len(item_values)]
+        order = order[order < chromosomes.shape[1]]
+        # Keep the longest run of picked items, best ratio first, that fits:
+        # the same as dropping the worst picked items until under the allowance
+        picked = chromosomes[:, order].astype(bool)
+        picked_weights = np.where(picked, item_weights[order], 0)
+        picked &= np.cumsum(picked_weights, axis=1) <= self.knapsack_allowance
+        weights = np.where(picked, item_weights[order], 0).sum(axis=1)
+        for column, item_weight in enumerate(item_weights[order].tolist()):
+            fits = ~picked[:, column] & (weights + item_weight <= self.knapsack_allowance)
+            picked[:, column] |= fits
+            weights += fits * item_weight
+        return np.where(picked, item_values[order], 0).sum(axis=1)
+
     def furthest_cannonball(self, chromosome):
         """
         Try to launch a cannon ball as far as possible.
@@ -157,8 +303,8 @@ class ExampleProblems():
 
         angle = 0
 
-        angle = int("".join([str(x) for x in chromosome[0:7]]), 2)
-        velocity = int("".join([str(x) for x in chromosome[7::]]), 2)
+        angle = bits_to_int(chromosome[0:7])
+        velocity = bits_to_int(chromosome[7::])
         #print("Angle = {}".format(angle))
         #print("Velocity = {}".format(velocity))
 
@@ -1,5 +1,19 @@
+import asyncio
+import base64
+import bisect
+import contextlib
+import functools
+import heapq
+import inspect
 import itertools
+import json
+import math
+import os
 import random
+import struct
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
 from enum import Enum
 
 
@@ -18,18 +32,269 @@ class CrossoverMethod(Enum):
 class BreakCondition(Enum):
     GENERATION = "generation"
     FITNESS = "fitness"
+    STALL = "stall"
+    TIME = "time"
+    EVALUATIONS = "evaluations"
+    DIVERSITY = "diversity"
 
 
-class Population():
+class BreakMode(Enum):
+    ANY = "any"
+    ALL = "all"
+
+
+# The statistics of one generation, as yielded by Population.evolve and passed to observers.
+# seconds is the time taken by that generation and elapsed the time since the simulation started.
+# diversity is the fraction of distinct chromosomes, locus_diversity the mean fraction of genes at which two
+# chromosomes differ, and duplicates the number of children replaced or re-mutated for being duplicates.
+_GenerationStatistics = namedtuple("GenerationRecord", ["generation", "best", "mean", "std", "diversity", "duplicates",
+                                                        "evaluations", "total_evaluations", "seconds", "elapsed"])
+
+
+class GenerationRecord(_GenerationStatistics):
+    """
+    The statistics of one generation. locus_diversity costs a pass over every gene of the population,
+    so it is only worked out, from that generation's chromosomes, the first time it is read.
+    """
+
+    def __new__(cls, *statistics, locus_diversity=None):
+        record = super().__new__(cls, *statistics)
+        record._locus_diversity = locus_diversity
+        return record
+
+    @property
+    def locus_diversity(self):
+        if callable(self._locus_diversity):
+            self._locus_diversity = self._locus_diversity()
+        return self._locus_diversity
+
+    def _asdict(self):
+        statistics = super()._asdict()
+        statistics["locus_diversity"] = self.locus_diversity
+        return statistics
+
+
+_BITS_TO_DIGITS = bytes.maketrans(b"\x00\x01", b"01")
+
+
+def bits_to_int(bits):
+    """
+    Convert a sequence of bits to an integer, most significant bit first.
+    e.g [0,1,0,1,1] -> 11
+    """
+    if hasattr(bits, "to_int"):
+        return bits.to_int()
+    if isinstance(bits, (list, tuple)):
+        # Read the bits as the digits of a base 2 string, much faster than shifting one bit at a time
+        try:
+            return int(bytes(bits).translate(_BITS_TO_DIGITS), 2)
+        except (TypeError, ValueError):
+            pass
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return value
+
+
+def chromosome_key(chromosome):
+    """Return a hashable key for a chromosome's content: the chromosome itself if hashable, otherwise a tuple"""
+    try:
+        hash(chromosome)
+        return chromosome
+    except TypeError:
+        return tuple(chromosome)
+
+
+def _to_json_number(number):
+    """Convert numpy scalars to plain Python numbers, so they can be written as JSON"""
+    return number.item() if hasattr(number, "item") else number
+
+
+def batch_fitness(fitness_function):
+    """
+    Mark a fitness function as scoring a whole population at once.
+    A batch fitness function takes a sequence of chromosomes (a list of lists, or a
+    2-D array for a NumpyPopulation) and returns a sequence of fitnesses in the same order.
+    """
+    fitness_function.is_batch_fitness = True
+    return fitness_function
+
+
+def is_batch_fitness(fitness_function):
+    """Return True if a fitness function has been marked with batch_fitness"""
+    return getattr(fitness_function, "is_batch_fitness", False)
+
+
+class FitnessCache():
+    """A bounded, least-recently-used store of fitness values keyed on chromosome content"""
+
+    def __init__(self, max_size=10000):
+        if max_size is not None and max_size < 1:
+            raise ValueError("Cache size must be at least 1, or None for an unbounded cache.")
+        self._max_size = max_size
+        self._fitnesses = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, chromosome):
+        return chromosome_key(chromosome)
+
+    def get(self, chromosome, key=None):
+        """Return the cached fitness of a chromosome, or None if it has not been seen.
+        A population may pass its own compact key for the chromosome, e.g the bytes of a numpy row."""
+        if key is None:
+            key = self._key(chromosome)
+        if key in self._fitnesses:
+            self.hits += 1
+            self._fitnesses.move_to_end(key)
+            return self._fitnesses[key]
+        self.misses += 1
+        return None
+
+    def add(self, chromosome, fitness, key=None):
+        """Store the fitness of a chromosome, evicting the least recently used entry when full"""
+        if key is None:
+            key = self._key(chromosome)
+        self._fitnesses[key] = fitness
+        self._fitnesses.move_to_end(key)
+        if self._max_size is not None and len(self._fitnesses) > self._max_size:
+            self._fitnesses.popitem(last=False)
+
+    def clear(self):
+        self._fitnesses.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._fitnesses)
+
+    def _get_max_size(self):
+        return self._max_size
+
+    def _get_hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0
+
+    def _get_stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self), "max_size": self._max_size,
+                "hit_rate": self.hit_rate}
+
+    max_size = property(_get_max_size)
+    hit_rate = property(_get_hit_rate)
+    stats = property(_get_stats)
+
+
+class ReplacementMethod(Enum):
+    GENERATIONAL = "generational"
+    STEADY_STATE = "steady_state"
+
+
+class DuplicateHandling(Enum):
+    KEEP = "keep"
+    REPLACE = "replace"
+    REMUTATE = "remutate"
+
+
+class ProfileMode(Enum):
+    OFF = "off"
+    TIMERS = "timers"
+    CPROFILE = "cprofile"
+    TRACEMALLOC = "tracemalloc"
+
+
+class PhaseTimer():
+    """
+    Accumulates the time spent in, and number of calls of, each named phase of a simulation.
+    Phases may be nested; the time of a phase excludes the phases inside it, e.g selection
+    time does not include the fitness evaluations it triggers.
+    """
+
     def __init__(self):
+        self._seconds = {}
+        self._calls = {}
+        self._child_seconds = []
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        self._child_seconds.append(0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            child_seconds = self._child_seconds.pop()
+            if self._child_seconds:
+                self._child_seconds[-1] += elapsed
+            self._seconds[name] = self._seconds.get(name, 0) + elapsed - child_seconds
+            self._calls[name] = self._calls.get(name, 0) + 1
+
+    def report(self):
+        """Return {phase: {"seconds": x, "calls": y}}, slowest phase first"""
+        return {name: {"seconds": self._seconds[name], "calls": self._calls[name]}
+                for name in sorted(self._seconds, key=self._seconds.get, reverse=True)}
+
+
+_NO_PHASE = contextlib.nullcontext()
+
+
+CHECKPOINT_MAGIC = b"GGACKPT1"
+
+
+class Population():
+    def __init__(self, seed=None):
+        self._seed = seed
+        self._random = random.Random(seed)
         self._chromosomes = None
         self._mutation_chance = 0.2
         self._crossover_chance = 1
         self._fitness_function = lambda x: 0
         self._chromosome_length = 0
-        self._break_condition = "generation"
+        self._break_condition = BreakCondition.GENERATION
         self._break_value = 1000
+        self._additional_break_conditions = []
+        self._break_mode = BreakMode.ANY
+        self._best_fitness = None
+        self._last_improvement_generation = 0
+        self._simulation_start_time = None
+        self._simulation_start_evaluations = 0
+        self._diversity = None
+        self._locus_diversity = None
+        self._duplicate_handling = DuplicateHandling.KEEP
+        self._duplicate_attempts = 10
+        self._generation_duplicates = 0
+        self._observers = []
+        self._keep_history = True
+        self._profile_mode = ProfileMode.OFF
+        self._timer = None
+        self._profiler = None
+        self._profile_report = None
         self._generation_count = 0
+        self._fitnesses = None
+        self._known_fitnesses = None
+        self._sorted_fitnesses = None
+        self._cumulative_fitnesses = None
+        self._generation_evaluations = 0
+        self._total_evaluations = 0
+        self._evaluations_per_generation = []
+        self._fitness_cache = None
+        self._max_workers = None
+        self._chunk_size = None
+        self._executor = None
+        self._async_concurrency = 100
+        self._tournament_size = 2
+        self._tournament_replacement = True
+        self._replacement_method = ReplacementMethod.GENERATIONAL
+        self._elite_count = 0
+        self._steady_state_count = 2
+        self._fitness_delta_function = None
+        self._delta_evaluations = 0
+        self._repair_function = None
+        self._max_fitnesses = []
+        self._avg_fitnesses = []
+        self._resuming = False
+        self._checkpoint_path = None
+        self._checkpoint_every = 1
+        self._checkpoint_times = []
 
         self._selection_method = SelectionMethod.CUTOFF
         self._crossover_method = CrossoverMethod.ONE_POINT
@@ -44,92 +309,285 @@ class Population():
             CrossoverMethod.FIXED_COMMON: self._fixed_common_feature_crossover,
         }
         self._break_conditions = {
-            BreakCondition.GENERATION: {"func": lambda: self._generation_count >= self._break_value,
+            BreakCondition.GENERATION: {"func": lambda value: self._generation_count >= value,
                                         "var": lambda: self._generation_count},
-            BreakCondition.FITNESS: {"func": lambda: self._get_fittest_chromosome()[1] >= self._break_value,
+            BreakCondition.FITNESS: {"func": lambda value: self._get_fittest_chromosome()[1] >= value,
                                      "var": lambda: self._get_fittest_chromosome()[1]},
+            BreakCondition.STALL: {"func": lambda value: self._get_stalled_generations() >= value,
+                                   "var": lambda: self._get_stalled_generations()},
+            BreakCondition.TIME: {"func": lambda value: self._get_elapsed_seconds() >= value,
+                                  "var": lambda: self._get_elapsed_seconds()},
+            # Stop before a generation that could take the evaluation count over the budget
+            BreakCondition.EVALUATIONS: {"func": lambda value: (self._get_simulation_evaluations() +
+                                                                self._get_next_generation_evaluations()) > value,
+                                         "var": lambda: self._get_simulation_evaluations()},
+            BreakCondition.DIVERSITY: {"func": lambda value: self._get_diversity() <= value,
+                                       "var": lambda: self._get_diversity()},
         }
 
     def chromosome_list_to_number(self, chromosome, max_value=False):
         """Returns an integer value from a chromosome list. Treats it as binary."""
         if max_value:
-            return int("".join([str(x) for x in chromosome]), 2) % max_value
+            return bits_to_int(chromosome) % max_value
         else:
-            return int("".join([str(x) for x in chromosome]), 2)
+            return bits_to_int(chromosome)
 
     def _cutoff_selection(self, num_to_select=2):
         """Return x number of chromosomes from current population, using cutoff selection"""
         prev_generation_size = len(self.chromosomes)
         cutoff = prev_generation_size//2
         prev_fitnesses = self.get_chromosomes_fitness()
-        prev_sorted_by_fitness = sorted(prev_fitnesses, key=lambda x: x[1])
-        new_generation = [x[0] for x in prev_sorted_by_fitness[cutoff::]]
+        new_generation = [x[0] for x in prev_fitnesses[:prev_generation_size - cutoff]]
         for c in range(0, num_to_select):
-            yield random.choice(new_generation)
+            yield self._random.choice(new_generation)
 
     def _roulette_selection(self, num_to_select=2):
         """Return x number of chromosomes from current population, using roulette selection"""
-        prev_fitnesses = self.get_chromosomes_fitness()
-        prev_sorted_by_fitness = [x[0]
-                                  for x in sorted(prev_fitnesses, key=lambda x: x[1])]
-        total_fitness = sum(x[1] for x in prev_fitnesses)
-        p_values = []
-        q_values = []
-
-        for x in prev_sorted_by_fitness:
-            f = self.get_fitness(x)
-            px = f/total_fitness
-            p_values.append(px)
-
-        cum_p = 0
-        for index, p in enumerate(p_values):
-            cum_p += p_values[index]
-            qx = cum_p
-            q_values.append(qx)
-
+        cumulative_fitnesses = self._get_cumulative_fitnesses()
+        total_fitness = cumulative_fitnesses[-1]
         for c in range(0, num_to_select):
-            r = random.random()
-            for index, q in enumerate(q_values):
-                if index == 0:
-                    if r <= q:
-                        yield prev_sorted_by_fitness[index]
-                else:
-                    if (r <= q and r > q_values[index-1]):
-                        yield prev_sorted_by_fitness[index]
+            if total_fitness <= 0:
+                # No chromosome is fitter than any other, so every one is equally likely
+                yield self._random.choice(self.chromosomes)
+            else:
+                index = bisect.bisect_right(cumulative_fitnesses, self._random.random() * total_fitness)
+                yield self.chromosomes[min(index, len(self.chromosomes) - 1)]
+
+    def _get_cumulative_fitnesses(self):
+        """Return the running total of fitness in population order, built once per generation"""
+        if self._cumulative_fitnesses is None:
+            self._cumulative_fitnesses = list(itertools.accumulate(self._get_fitnesses()))
+        return self._cumulative_fitnesses
 
     def _tournament_selection(self, num_to_select=2):
+        """Return x number of chromosomes, each the fittest of tournament_size randomly chosen contestants"""
+        fitnesses = self._get_fitnesses()
+        population_size = len(self.chromosomes)
+        tournament_size = min(self._tournament_size, population_size)
         for c in range(0, num_to_select):
-            chr1 = random.choice(self.chromosomes)
-            chr2 = random.choice(self.chromosomes)
-            chr1_fitness = self.get_fitness(chr1)
-            chr2_fitness = self.get_fitness(chr2)
-            if chr1_fitness >= chr2_fitness:
-                yield chr1
+            if self._tournament_replacement:
+                contestants = self._random.choices(range(0, population_size), k=tournament_size)
             else:
-                yield chr2
+                contestants = self._random.sample(range(0, population_size), tournament_size)
+            yield self.chromosomes[max(contestants, key=fitnesses.__getitem__)]
 
     def get_fitness(self, chromosome):
-        """Get the fitness of a given chromosome based on the population fitness function, with a minimum of 0."""
-        fitness = self.fitness_function(chromosome)
-        return max(0, fitness)
+        """Get the fitness of a given chromosome based on the population fitness function, with a minimum of 0.
+        If a fitness cache is set, previously seen chromosomes are looked up instead of re-evaluated."""
+        return self._evaluate_chromosomes([chromosome])[0]
+
+    def _evaluate_chromosomes(self, chromosomes, known_fitnesses=None):
+        """Return the fitness of each of the given chromosomes, only calling the fitness function for cache misses
+        and chromosomes whose fitness is not already known"""
+        fitnesses, missing, missing_chromosomes = self._get_cached_fitnesses(chromosomes, known_fitnesses)
+        if missing:
+            with self._phase("evaluation"):
+                missing_fitnesses = self._score_chromosomes(missing_chromosomes)
+            self._add_fitnesses(fitnesses, missing, missing_chromosomes, missing_fitnesses)
+        return fitnesses
+
+    async def _evaluate_chromosomes_async(self, chromosomes, known_fitnesses=None):
+        """Return the fitness of each of the given chromosomes, awaiting the fitness function for cache misses
+        and chromosomes whose fitness is not already known"""
+        fitnesses, missing, missing_chromosomes = self._get_cached_fitnesses(chromosomes, known_fitnesses)
+        if missing:
+            with self._phase("evaluation"):
+                missing_fitnesses = await self._score_chromosomes_async(missing_chromosomes)
+            self._add_fitnesses(fitnesses, missing, missing_chromosomes, missing_fitnesses)
+        return fitnesses
+
+    def _get_cached_fitnesses(self, chromosomes, known_fitnesses=None):
+        """
+        Return a list of known fitnesses (None where unknown), the unknown indices and their chromosomes.
+        With a fitness cache, copies of the same unknown chromosome are grouped, so that each distinct
+        chromosome is looked up and scored once: each entry of the unknown indices is a list of the
+        indices of one chromosome's copies.
+        """
+        if known_fitnesses is None:
+            known_fitnesses = [None] * len(chromosomes)
+        fitnesses = list(known_fitnesses)
+        if self._fitness_cache is None:
+            missing = [[index] for index, fitness in enumerate(fitnesses) if fitness is None]
+        else:
+            cached = {}
+            groups = {}
+            for index, (chromosome, fitness) in enumerate(zip(chromosomes, known_fitnesses)):
+                if fitness is not None:
+                    continue
+                key = self._chromosome_key(chromosome)
+                if key in groups:
+                    groups[key].append(index)
+                    continue
+                if key not in cached:
+                    cached[key] = self._fitness_cache.get(chromosome, key)
+                if cached[key] is None:
+                    groups[key] = [index]
+                else:
+                    fitnesses[index] = cached[key]
+            missing = list(groups.values())
+        return fitnesses, missing, self._take_chromosomes(chromosomes, [indices[0] for indices in missing])
+
+    def _add_fitnesses(self, fitnesses, missing, missing_chromosomes, missing_fitnesses):
+        """Fill in newly scored fitnesses for every copy of each chromosome, adding them to the fitness cache if one is set"""
+        for indices, chromosome, fitness in zip(missing, missing_chromosomes, missing_fitnesses):
+            if self._fitness_cache is not None:
+                self._fitness_cache.add(chromosome, fitness, self._chromosome_key(chromosome))
+            for index in indices:
+                fitnesses[index] = fitness
+
+    def _score_chromosomes(self, chromosomes):
+        """Call the fitness function on the given chromosomes, once per chromosome or once for a batch fitness function"""
+        if inspect.iscoroutinefunction(self.fitness_function):
+            return asyncio.run(self._score_chromosomes_async(chromosomes))
+        self._generation_evaluations += len(chromosomes)
+        self._total_evaluations += len(chromosomes)
+        if is_batch_fitness(self.fitness_function):
+            # Batch functions often return numpy values; keep the fitness table to plain Python numbers
+            return [max(0, _to_json_number(fitness)) for fitness in self.fitness_function(chromosomes)]
+        return [max(0, fitness) for fitness in self._map_fitness_function(chromosomes)]
+
+    async def _score_chromosomes_async(self, chromosomes):
+        """Await an async fitness function on the given chromosomes concurrently, with at most
+        async_concurrency evaluations in flight at once. Plain fitness functions are called as normal."""
+        if not inspect.iscoroutinefunction(self.fitness_function):
+            return self._score_chromosomes(chromosomes)
+        self._generation_evaluations += len(chromosomes)
+        self._total_evaluations += len(chromosomes)
+        semaphore = asyncio.Semaphore(self._async_concurrency)
+
+        async def score(chromosome):
+            async with semaphore:
+                return max(0, await self.fitness_function(chromosome))
+
+        return list(await asyncio.gather(*[score(chromosome) for chromosome in chromosomes]))
+
+    def _map_fitness_function(self, chromosomes):
+        """Apply the fitness function to each chromosome, over the process pool if parallel evaluation is set"""
+        if not self._max_workers or len(chromosomes) < 2:
+            return map(self.fitness_function, chromosomes)
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self._max_workers)
+        chunk_size = self._chunk_size or max(1, -(-len(chromosomes) // (self._max_workers * 4)))
+        return self._executor.map(self.fitness_function, chromosomes, chunksize=chunk_size)
+
+    def set_parallel_evaluation(self, max_workers, chunk_size=None):
+        """
+        Evaluate each generation over a pool of max_workers processes, or serially if max_workers is None or 0.
+        Chromosomes are sent to the workers in chunks of chunk_size (by default, 4 chunks per worker).
+        The fitness function must be picklable, e.g a module level function or an ExampleProblems method.
+        """
+        if max_workers is not None and (not isinstance(max_workers, int) or max_workers < 0):
+            raise ValueError("Number of workers must be a positive int, or None to evaluate serially.")
+        if chunk_size is not None and (not isinstance(chunk_size, int) or chunk_size < 1):
+            raise ValueError("Chunk size must be a positive int, or None to choose automatically.")
+        self.shutdown_parallel_evaluation()
+        self._max_workers = max_workers
+        self._chunk_size = chunk_size
+
+    def shutdown_parallel_evaluation(self):
+        """Shut down the process pool used for parallel evaluation, if one is running"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _take_chromosomes(self, chromosomes, indices):
+        return [chromosomes[index] for index in indices]
+
+    def _get_fitnesses(self):
+        """Return the fitness of each chromosome in the current population, in population order.
+        Each chromosome is evaluated once per generation; the table is reset when the population is replaced."""
+        if self._fitnesses is None:
+            self._fitnesses = self._evaluate_chromosomes(self.chromosomes, self._known_fitnesses)
+        return self._fitnesses
+
+    async def _get_fitnesses_async(self):
+        """Fill the fitness table of the current population, awaiting an async fitness function"""
+        if self._fitnesses is None:
+            self._fitnesses = await self._evaluate_chromosomes_async(self.chromosomes, self._known_fitnesses)
+        return self._fitnesses
+
+    def _clear_fitness_table(self):
+        """Forget the fitnesses of the current population, e.g after it has been replaced"""
+        self._fitnesses = None
+        self._diversity = None
+        self._locus_diversity = None
+        self._known_fitnesses = None
+        self._sorted_fitnesses = None
+        self._cumulative_fitnesses = None
 
     def get_chromosomes_fitness(self):
         """Return a list of chromosome, fitness tuples, sorted in descending order of fitness"""
-        return sorted([(chr, self.get_fitness(chr)) for chr in self.chromosomes], key=lambda x: x[1])[::-1]
+        if self._sorted_fitnesses is None:
+            self._sorted_fitnesses = sorted(zip(self.chromosomes, self._get_fitnesses()), key=lambda x: x[1])[::-1]
+        return self._sorted_fitnesses
 
     def generate_all_possibilities(self, chromosome_length):
         """Return a list of all possible chromosomes of a given length"""
         return ["".join(seq) for seq in itertools.product("01", repeat=chromosome_length)]
 
+    def iterate_all_possibilities(self, chromosome_length, start=0, stop=None):
+        """Lazily yield every possible chromosome of a given length, in order of binary value.
+        start and stop limit the range of values, e.g to split the space into resumable parts."""
+        if stop is None:
+            stop = self._count_possibilities(chromosome_length)
+        for value in range(start, stop):
+            yield self._make_chromosomes([value], chromosome_length)[0]
+
+    def _make_chromosomes(self, values, chromosome_length):
+        """Return the chromosomes whose bits are the binary representations of the given values"""
+        shifts = range(chromosome_length - 1, -1, -1)
+        return [[(value >> shift) & 1 for shift in shifts] for value in values]
+
+    def _chromosome_value(self, chromosome):
+        """Return the number of a chromosome in the order of iterate_all_possibilities"""
+        return bits_to_int(chromosome)
+
+    def _count_possibilities(self, chromosome_length):
+        return 2 ** chromosome_length
+
+    def exhaustive_search(self, chromosome_length, top_k=1, start=0, stop=None, chunk_size=4096, best=None):
+        """
+        Score every chromosome of a given length and return the top_k as a list of chromosome, fitness
+        tuples, sorted in descending order of fitness. Only the running top_k are kept in memory.
+        Chromosomes are scored in chunks, using a batch fitness function or the process pool if set.
+        Chromosomes are numbered by binary value, so a search can be split into ranges [start, stop)
+        and resumed: pass the result of the earlier ranges as best to carry on from them.
+        """
+        if top_k < 1:
+            raise ValueError("top_k must be at least 1.")
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be at least 1.")
+        if stop is None:
+            stop = self._count_possibilities(chromosome_length)
+        # Keep (fitness, -value) so that ties are won by the lowest value, as a sorted search would
+        top = [(fitness, -self._chromosome_value(chromosome)) for chromosome, fitness in (best or [])]
+        top = heapq.nlargest(top_k, top)
+        heapq.heapify(top)
+        try:
+            for chunk_start in range(start, stop, chunk_size):
+                values = range(chunk_start, min(chunk_start + chunk_size, stop))
+                fitnesses = self._score_chromosomes(self._make_chromosomes(values, chromosome_length))
+                for value, fitness in zip(values, fitnesses):
+                    if len(top) < top_k:
+                        heapq.heappush(top, (fitness, -value))
+                    elif (fitness, -value) > top[0]:
+                        heapq.heapreplace(top, (fitness, -value))
+        finally:
+            self.shutdown_parallel_evaluation()
+
+        ranked = sorted(top, reverse=True)
+        chromosomes = self._make_chromosomes([-value for fitness, value in ranked], chromosome_length)
+        return list(zip(chromosomes, [fitness for fitness, value in ranked]))
+
     def generate_random_sample(self, number_of_samples, chromosome_length):
         """Generate a random sample of chromosomes of a given length"""
         bit_choices = [0]*chromosome_length + [1]*chromosome_length
         for sample in range(0, number_of_samples):
-            yield random.sample(bit_choices, chromosome_length)
+            yield self._random.sample(bit_choices, chromosome_length)
 
     def crossover(self, chr1, chr2):
         """Do the selected crossover with the selected crossover chance"""
-        if random.random() <= self._crossover_chance:
+        if self._random.random() <= self._crossover_chance:
             for crossover_chr in self._crossover_methods[self._crossover_method](chr1, chr2):
                 yield crossover_chr
         else:
@@ -138,7 +596,7 @@ class Population():
 
     def _random_single_point_crossover(self, chr1, chr2):
         """Yield 2 offspring of 2 parent chromosomes using crossover operator with a random crossover point"""
-        return [crossed_chr for crossed_chr in self._single_point_crossover(chr1, chr2, random.randrange(0, len(chr1)))]
+        return [crossed_chr for crossed_chr in self._single_point_crossover(chr1, chr2, self._random.randrange(0, len(chr1)))]
 
     def _single_point_crossover(self, chr1, chr2, crossover_point):
         """Yield 2 offspring of 2 parent chromosomes using crossover operator"""
@@ -146,8 +604,8 @@ class Population():
         yield chr2[:crossover_point] + chr1[crossover_point::]
 
     def _random_two_point_crossover(self, chr1, chr2):
-        rand_index_a = random.randrange(0, len(chr1))
-        rand_index_b = random.randrange(0, len(chr1))
+        rand_index_a = self._random.randrange(0, len(chr1))
+        rand_index_b = self._random.randrange(0, len(chr1))
         crossover_a = min(rand_index_a, rand_index_b)
         crossover_b = max(rand_index_a, rand_index_b)
         return [crossed_chr for crossed_chr in self._two_point_crossover(chr1, chr2, crossover_a, crossover_b)]
@@ -175,61 +633,556 @@ class Population():
                 chr3.append(c1)
                 chr4.append(c1)
             else:
-                chr3.append(random.choice([0, 1]))
-                chr4.append(random.choice([0, 1]))
+                chr3.append(self._random.choice([0, 1]))
+                chr4.append(self._random.choice([0, 1]))
         yield chr3
         yield chr4
 
     def _mutate(self, chromosome):
         """Flip a random bit of a chromosome with a given probability"""
-        if random.random() <= self.mutation_chance:
-            flip_index = random.randrange(0, len(chromosome))
+        if self._random.random() <= self.mutation_chance:
+            flip_index = self._random.randrange(0, len(chromosome))
             chromosome[flip_index] = (chromosome[flip_index] + 1) % 2
         return chromosome
 
     def _has_reached_break_generation(self, echo=False):
         """Check if the current generation fulfils a stopping criteria"""
+        conditions = [(self._break_condition, self._break_value)] + self._additional_break_conditions
         if echo:
-            print("{name}\t{current_value} / {break_value}\t {percentage:.1f}%".format(name=self._break_condition,
-                                                                                       current_value=self._break_conditions[self._break_condition]["var"](
-                                                                                       ),
-                                                                                       break_value=self._break_value,
-                                                                                       percentage=self._break_conditions[self._break_condition]["var"]()/self._break_value*100),
-                  end="\r")
+            print("\t".join("{name}\t{current_value} / {break_value}\t {percentage:.1f}%".format(
+                name=condition, current_value=self._break_conditions[condition]["var"](), break_value=value,
+                percentage=self._break_conditions[condition]["var"]()/value*100 if value else 100)
+                for condition, value in conditions), end="\r")
+
+        if self._break_mode == BreakMode.ALL:
+            return all(self._break_conditions[condition]["func"](value) for condition, value in conditions)
+        return any(self._break_conditions[condition]["func"](value) for condition, value in conditions)
 
-        return self._break_conditions[self._break_condition]["func"]()
+    def _get_stalled_generations(self):
+        """Number of generations since the best fitness of the simulation last improved"""
+        return self._generation_count - self._last_improvement_generation
+
+    def _get_elapsed_seconds(self):
+        if self._simulation_start_time is None:
+            return 0
+        return time.perf_counter() - self._simulation_start_time
+
+    def _get_simulation_evaluations(self):
+        """Number of fitness evaluations made since the simulation started"""
+        return self._total_evaluations - self._simulation_start_evaluations
+
+    def _get_next_generation_evaluations(self):
+        """
+        Return the most fitness evaluations the next generation can make: scoring any of the current
+        population that has not been scored yet, e.g the starting population, and then every new child.
+        """
+        unscored = 0
+        if self._fitnesses is None:
+            if self._known_fitnesses is None:
+                unscored = len(self.chromosomes)
+            else:
+                unscored = sum(fitness is None for fitness in self._known_fitnesses)
+        return unscored + len(self.chromosomes) - self._get_survivor_count()
+
+    def _get_diversity(self):
+        """Return the fraction of the population that are distinct chromosomes, computed once per generation"""
+        if self._diversity is None:
+            self._diversity = len(set(self._chromosome_key(chromosome) for chromosome in self.chromosomes)) / len(self.chromosomes)
+        return self._diversity
+
+    def _chromosome_key(self, chromosome):
+        return chromosome_key(chromosome)
+
+    def _get_locus_diversity(self):
+        """
+        Return the mean fraction of genes at which two different chromosomes of the population differ,
+        i.e their normalised Hamming distance, worked out from how many chromosomes have each value at each gene.
+        """
+        if self._locus_diversity is None:
+            self._locus_diversity = self._measure_locus_diversity(self.chromosomes)
+        return self._locus_diversity
+
+    def _measure_locus_diversity(self, chromosomes):
+        population_size = len(chromosomes)
+        if population_size < 2 or not self._chromosome_length:
+            return 0
+        pairs = population_size * (population_size - 1)
+        return sum((population_size * population_size - sum(count * count for count in counts)) / pairs
+                   for counts in self._locus_counts(chromosomes)) / self._chromosome_length
+
+    def _locus_counts(self, chromosomes):
+        """Yield, for each gene, the number of chromosomes with each of its values"""
+        population_size = len(chromosomes)
+        for column in zip(*chromosomes):
+            ones = sum(column)
+            yield (ones, population_size - ones)
 
     def next_generation(self):
-        """Generate a new population from the current one and replaces it."""
-        prev_generation_size = len(self.chromosomes)
+        """Generate a new population from the current one and replaces it.
+        Survivors (elites, or all but the worst in steady state mode) are carried forward
+        unchanged, keeping their known fitness, and the rest of the population is replaced by children."""
+        with self._phase("survivors"):
+            survivors = self._get_survivors()
+        children, parents, parent_fitnesses = self._breed(len(self.chromosomes) - len(survivors))
+        if self._repair_function is not None:
+            with self._phase("repair"):
+                for index in range(0, len(children)):
+                    children[index] = self._repair(children[index])
+        if self._duplicate_handling != DuplicateHandling.KEEP:
+            with self._phase("duplicates"):
+                self._replace_duplicates([chromosome for chromosome, fitness in survivors], children)
+        with self._phase("delta_fitness"):
+            known_fitnesses = self._get_delta_fitnesses(children, parents, parent_fitnesses)
+        with self._phase("replacement"):
+            self._replace_population(self._join_generation([chromosome for chromosome, fitness in survivors], children),
+                                     [fitness for chromosome, fitness in survivors] + known_fitnesses)
+
+    def get_fittest(self, count):
+        """Return copies of the x fittest chromosomes, as a list of chromosome, fitness tuples"""
+        return [(self._copy_chromosome(chromosome), fitness) for chromosome, fitness in self.get_chromosomes_fitness()[:count]]
+
+    def immigrate(self, chromosomes, fitnesses=None):
+        """Replace the least fit chromosomes with the given ones, keeping their fitnesses if they are known"""
+        chromosomes = [list(chromosome) for chromosome in chromosomes]
+        if fitnesses is None:
+            fitnesses = [None] * len(chromosomes)
+        survivors = self.get_chromosomes_fitness()[:max(0, len(self.chromosomes) - len(chromosomes))]
+        self._replace_population([list(chromosome) for chromosome, fitness in survivors] + chromosomes,
+                                 [fitness for chromosome, fitness in survivors] + list(fitnesses))
+
+    def _get_survivor_count(self):
+        """Return the number of chromosomes carried forward unchanged to the next generation"""
+        if self._replacement_method == ReplacementMethod.STEADY_STATE:
+            return max(0, len(self.chromosomes) - self._steady_state_count)
+        return min(self._elite_count, len(self.chromosomes))
+
+    def _get_survivors(self):
+        """Return copies of the fittest chromosomes to carry forward, as (chromosome, fitness) tuples"""
+        return self.get_fittest(self._get_survivor_count())
+
+    def _breed(self, number_of_children):
+        """
+        Make new chromosomes by selection, crossover and mutation of the current population.
+        Returns lists of the children, the parent each child was mostly copied from, and that parent's fitness.
+        """
+        if number_of_children <= 0:
+            return [], [], []
+        number_of_pairs = (number_of_children + 1)//2
         new_generation = []
 
-        while len(new_generation) < prev_generation_size:
-            # Select 2 chromosomes from current generation:
-            chr1, chr2 = self._selection_methods[self._selection_method](2)
-            # Crossover these chromosomes (using a set chance):
-            chr3, chr4 = self.crossover(chr1, chr2)
-            new_generation.append(chr3)
-            new_generation.append(chr4)
-        # Mutate the new population with a given chance:
-        new_population = [self._mutate(chromosome)
-                          for chromosome in new_generation]
+        # Select every parent needed for the new generation in one batch:
+        with self._phase("selection"):
+            parents = list(self._selection_methods[self._selection_method](2 * number_of_pairs))
+        with self._phase("crossover"):
+            for chr1, chr2 in zip(parents[0::2], parents[1::2]):
+                # Crossover these chromosomes (using a set chance):
+                chr3, chr4 = self.crossover(chr1, chr2)
+                new_generation.append(chr3)
+                new_generation.append(chr4)
+        # Mutate copies of the new population with a given chance, so parents are never changed in place:
+        with self._phase("mutation"):
+            children = [self._mutate(self._copy_chromosome(chromosome))
+                        for chromosome in new_generation[:number_of_children]]
+
+        fitnesses_by_id = {id(chromosome): fitness for chromosome, fitness in zip(self.chromosomes, self._get_fitnesses())}
+        parents = parents[:number_of_children]
+        return children, parents, [fitnesses_by_id[id(parent)] for parent in parents]
+
+    def _copy_chromosome(self, chromosome):
+        return list(chromosome)
+
+    def _to_chromosome(self, sequence):
+        """Return a sequence of genes, e.g a list returned by a repair function, as a chromosome of this population"""
+        return list(sequence)
+
+    def _replace_duplicates(self, survivors, children):
+        """
+        Replace, in place, each child that is a copy of a survivor or an earlier child, either with a new
+        random chromosome or by mutating it again, so that evaluations are spent on distinct chromosomes.
+        Gives up on a child after duplicate_attempts tries, e.g when the search space is nearly exhausted.
+        """
+        seen = set(self._chromosome_key(chromosome) for chromosome in survivors)
+        self._generation_duplicates = 0
+        for index in range(0, len(children)):
+            child = children[index]
+            key = self._chromosome_key(child)
+            attempts = 0
+            while key in seen and attempts < self._duplicate_attempts:
+                if self._duplicate_handling == DuplicateHandling.REMUTATE:
+                    child = self._force_mutation(self._copy_chromosome(child))
+                else:
+                    child = next(iter(self.generate_random_sample(1, self._chromosome_length)))
+                if self._repair_function is not None:
+                    child = self._repair(child)
+                key = self._chromosome_key(child)
+                attempts += 1
+            if attempts:
+                self._generation_duplicates += 1
+                children[index] = child
+            seen.add(key)
+
+    def _repair(self, chromosome):
+        """Apply the repair function to a chromosome, returning it as a chromosome of this population"""
+        return self._to_chromosome(self._repair_function(chromosome))
+
+    def _force_mutation(self, chromosome):
+        """Mutate a chromosome regardless of the mutation chance"""
+        mutation_chance = self._mutation_chance
+        self._mutation_chance = 1
+        try:
+            return self._mutate(chromosome)
+        finally:
+            self._mutation_chance = mutation_chance
+
+    def _join_generation(self, survivors, children):
+        return survivors + children
+
+    def _get_delta_fitnesses(self, children, parents, parent_fitnesses):
+        """
+        Return the fitness of each child, updated from its parent's fitness with the fitness delta function.
+        Unknown fitnesses are None, e.g when no delta function is set or it could not update a fitness.
+        """
+        if self._fitness_delta_function is None:
+            return [None] * len(children)
+        fitnesses = []
+        for child, parent, parent_fitness in zip(children, parents, parent_fitnesses):
+            fitness = self._fitness_delta_function(parent_fitness, self._changed_indices(parent, child), child)
+            if fitness is None:
+                fitnesses.append(None)
+            else:
+                self._delta_evaluations += 1
+                fitnesses.append(max(0, fitness))
+        return fitnesses
 
-        self.chromosomes = new_population  # Update the population
+    def _changed_indices(self, parent, child):
+        """Return the positions at which a child differs from its parent"""
+        return [index for index, (parent_bit, child_bit) in enumerate(zip(parent, child)) if parent_bit != child_bit]
+
+    def _replace_population(self, chromosomes, known_fitnesses):
+        """Replace the population, keeping the fitnesses that are already known (None where unknown)"""
+        self.chromosomes = chromosomes  # Update the population
+        self._known_fitnesses = known_fitnesses
 
     def simulate(self, echo=True, plot=True):
-        """Simulate a given number of generations and return the final population"""
-        max_fitnesses = []
-        avg_fitnesses = []
+        """Simulate a given number of generations and return the final population.
+        If profile_mode is set, a report of where the time went is left in profile_report."""
+        for record in self.evolve(echo=echo, keep_history=True):
+            pass
+
+        self._report_simulation(self._max_fitnesses, self._avg_fitnesses, echo=echo, plot=plot)
+
+        # if plot:
+        return [self._max_fitnesses, self._avg_fitnesses]
+
+    def evolve(self, echo=False, keep_history=False):
+        """
+        Simulate generations until the break condition is met, yielding a GenerationRecord after each one.
+        Observers are called with each record before it is yielded. Unless keep_history is set, the
+        per-generation max, average and evaluation lists are not kept, so long runs use constant memory.
+        """
+        self._start_simulation(keep_history)
+        try:
+            while(not self._check_break(echo)):
+                start = time.perf_counter()
+                self._generation_count += 1
+                self.next_generation()
+                yield self._record_generation(start)
+        finally:
+            self.shutdown_parallel_evaluation()
+            self._finish_simulation()
+
+    async def next_generation_async(self):
+        """Generate a new population from the current one and replaces it, awaiting an async fitness function."""
+        await self._get_fitnesses_async()
+        self.next_generation()
+        await self._get_fitnesses_async()
+
+    async def simulate_async(self, echo=True, plot=True):
+        """Simulate a given number of generations with an async fitness function, evaluating
+        each generation concurrently, and return the final population"""
+        async for record in self.evolve_async(echo=echo, keep_history=True):
+            pass
+
+        self._report_simulation(self._max_fitnesses, self._avg_fitnesses, echo=echo, plot=plot)
+        return [self._max_fitnesses, self._avg_fitnesses]
+
+    async def evolve_async(self, echo=False, keep_history=False):
+        """As evolve, but awaiting an async fitness function and evaluating each generation concurrently"""
+        self._start_simulation(keep_history)
+        try:
+            await self._get_fitnesses_async()
+            while(not self._check_break(echo)):
+                start = time.perf_counter()
+                self._generation_count += 1
+                await self.next_generation_async()
+                yield self._record_generation(start)
+        finally:
+            self.shutdown_parallel_evaluation()
+            self._finish_simulation()
+
+    def _check_break(self, echo):
+        with self._phase("break_check"):
+            return self._has_reached_break_generation(echo=echo)
+
+    def _phase(self, name):
+        """Return a context that times a phase of the simulation when profiling, and does nothing otherwise"""
+        if self._timer is None:
+            return _NO_PHASE
+        return self._timer.phase(name)
+
+    def add_observer(self, observer):
+        """Register a function to be called with the GenerationRecord of every simulated generation"""
+        self._observers.append(observer)
+
+    def remove_observer(self, observer):
+        self._observers.remove(observer)
+
+    def _start_simulation(self, keep_history=True):
+        """Reset the generation count and statistics, unless carrying on from a resumed checkpoint"""
+        self._keep_history = keep_history
+        self._start_profiling()
+        self._simulation_start_time = time.perf_counter()
+        self._simulation_start_evaluations = self._total_evaluations
+        if self._resuming:
+            self._resuming = False
+            self._simulation_start_evaluations -= sum(self._evaluations_per_generation)
+            return
         self._generation_count = 0
-        while(not self._has_reached_break_generation(echo=echo)):
-            self._generation_count += 1
-            self.next_generation()
+        self._max_fitnesses = []
+        self._avg_fitnesses = []
+        self._evaluations_per_generation = []
+        self._best_fitness = None
+        self._last_improvement_generation = 0
+
+    def _record_generation(self, start):
+        """Record the statistics of the current generation, write a checkpoint if one is due, and notify observers"""
+        with self._phase("statistics"):
+            best, mean, std = self._get_fitness_statistics()
+            diversity = self._get_diversity()
+        if self._keep_history:
+            self._max_fitnesses.append(best)
+            self._avg_fitnesses.append(mean)
+            self._evaluations_per_generation.append(self._generation_evaluations)
+        if self._best_fitness is None or best > self._best_fitness:
+            self._best_fitness = best
+            self._last_improvement_generation = self._generation_count
+        if self._checkpoint_path is not None and self._generation_count % self._checkpoint_every == 0:
+            checkpoint_start = time.perf_counter()
+            with self._phase("checkpoint"):
+                self.save_checkpoint(self._checkpoint_path)
+            self._checkpoint_times.append(time.perf_counter() - checkpoint_start)
+
+        end = time.perf_counter()
+        # Each generation replaces the chromosome list rather than editing it, so the record can keep this one
+        # and measure its locus diversity later, if at all
+        if self._locus_diversity is None:
+            locus_diversity = functools.partial(self._measure_locus_diversity, self.chromosomes)
+        else:
+            locus_diversity = self._locus_diversity
+        record = GenerationRecord(self._generation_count, best, mean, std, diversity, self._generation_duplicates,
+                                  self._generation_evaluations, self._total_evaluations, end - start,
+                                  end - self._simulation_start_time, locus_diversity=locus_diversity)
+        for observer in self._observers:
+            observer(record)
+        return record
+
+    def _start_profiling(self):
+        """Start timing phases, and the cProfile or tracemalloc capture, as set by profile_mode"""
+        self._timer = None if self._profile_mode == ProfileMode.OFF else PhaseTimer()
+        self._profile_report = None
+        self._profiler = None
+        if self._profile_mode == ProfileMode.CPROFILE:
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif self._profile_mode == ProfileMode.TRACEMALLOC:
+            import tracemalloc
+            tracemalloc.start()
+            tracemalloc.reset_peak()
+
+    def _finish_simulation(self):
+        """Stop any profiling capture and build the profile report of the simulation"""
+        if self._timer is None:
+            return
+        report = {
+            "generations": len(self._max_fitnesses) if self._keep_history else self._generation_count,
+            "seconds": self._get_elapsed_seconds(),
+            "phases": self._timer.report(),
+            "evaluations": self._get_simulation_evaluations(),
+            "delta_evaluations": self._delta_evaluations,
+            "evaluations_per_generation": list(self._evaluations_per_generation),
+            "cache": None if self._fitness_cache is None else self._fitness_cache.stats,
+        }
+        if self._profile_mode == ProfileMode.CPROFILE:
+            import io
+            import pstats
+            self._profiler.disable()
+            stream = io.StringIO()
+            pstats.Stats(self._profiler, stream=stream).sort_stats("cumulative").print_stats(20)
+            report["profile"] = stream.getvalue()
+        elif self._profile_mode == ProfileMode.TRACEMALLOC:
+            import tracemalloc
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            report["allocations"] = {
+                "current_bytes": current,
+                "peak_bytes": peak,
+                "top": [(str(statistic.traceback), statistic.size, statistic.count)
+                        for statistic in snapshot.statistics("lineno")[:20]],
+            }
+        self._timer = None
+        self._profiler = None
+        self._profile_report = report
+
+    def _get_fitness_statistics(self):
+        """Return the best, mean and standard deviation of the current generation's fitnesses, in a single pass"""
+        best = None
+        total = 0
+        running_mean = 0
+        sum_of_squares = 0
+        for count, fitness in enumerate(self._get_fitnesses(), 1):
+            if best is None or fitness > best:
+                best = fitness
+            total += fitness
+            difference = fitness - running_mean
+            running_mean += difference / count
+            sum_of_squares += difference * (fitness - running_mean)
+        return best, total / len(self.chromosomes), math.sqrt(sum_of_squares / len(self.chromosomes))
+
+    def set_checkpoint(self, path, every=1):
+        """Write a checkpoint to path every x generations while simulating, or never if path is None"""
+        if not isinstance(every, int) or every < 1:
+            raise ValueError("Checkpoint interval must be an int of at least 1.")
+        self._checkpoint_path = path
+        self._checkpoint_every = every
+
+    def save_checkpoint(self, path):
+        """
+        Save the state of the population to a file, so that a simulation can be resumed with Population.resume.
+        The file holds a JSON header (settings, fitnesses, statistics and random state) followed by the
+        chromosomes packed 8 bits to a byte. It is written to a temporary file first and renamed into place,
+        so a crash part way through never leaves a broken checkpoint.
+        """
+        fitnesses = self._fitnesses if self._fitnesses is not None else self._known_fitnesses
+        header = {
+            "population_size": len(self.chromosomes),
+            "chromosome_length": self._chromosome_length,
+            "generation_count": self._generation_count,
+            "break_condition": BreakCondition(self._break_condition).value,
+            "break_value": self._break_value,
+            "additional_break_conditions": [[condition.value, value] for condition, value in self._additional_break_conditions],
+            "break_mode": self._break_mode.value,
+            "best_fitness": _to_json_number(self._best_fitness),
+            "last_improvement_generation": self._last_improvement_generation,
+            "selection_method": self._selection_method.value,
+            "crossover_method": self._crossover_method.value,
+            "replacement_method": self._replacement_method.value,
+            "mutation_chance": self._mutation_chance,
+            "crossover_chance": self._crossover_chance,
+            "tournament_size": self._tournament_size,
+            "tournament_replacement": self._tournament_replacement,
+            "elite_count": self._elite_count,
+            "steady_state_count": self._steady_state_count,
+            "duplicate_handling": self._duplicate_handling.value,
+            "duplicate_attempts": self._duplicate_attempts,
+            "fitnesses": None if fitnesses is None else [_to_json_number(fitness) for fitness in fitnesses],
+            "max_fitnesses": [_to_json_number(fitness) for fitness in self._max_fitnesses],
+            "avg_fitnesses": [_to_json_number(fitness) for fitness in self._avg_fitnesses],
+            "evaluations_per_generation": self._evaluations_per_generation,
+            "seed": self._seed,
+            "random_state": self._get_random_state(),
+        }
+        header.update(self._get_checkpoint_settings())
+        header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+
+        temporary_path = "{}.tmp".format(path)
+        with open(temporary_path, "wb") as checkpoint_file:
+            checkpoint_file.write(CHECKPOINT_MAGIC)
+            checkpoint_file.write(struct.pack(">I", len(header_bytes)))
+            checkpoint_file.write(header_bytes)
+            checkpoint_file.write(self._pack_chromosomes())
+        os.replace(temporary_path, path)
 
-            # if plot:
-            max_fitnesses.append(self.fittest_chromosome[1])
-            avg_fitnesses.append(self.average_fitness)
+    @classmethod
+    def resume(cls, path):
+        """
+        Load a population saved with save_checkpoint. The fitness function (and any cache, delta
+        function or parallel evaluation) must be set again before calling simulate, which then
+        carries on from the saved generation exactly as if it had never stopped.
+        """
+        with open(path, "rb") as checkpoint_file:
+            if checkpoint_file.read(len(CHECKPOINT_MAGIC)) != CHECKPOINT_MAGIC:
+                raise ValueError("{} is not a population checkpoint.".format(path))
+            header_length, = struct.unpack(">I", checkpoint_file.read(4))
+            header = json.loads(checkpoint_file.read(header_length).decode("utf-8"))
+            packed_chromosomes = checkpoint_file.read()
 
+        population = cls()
+        population._set_checkpoint_settings(header)
+        population.chromosomes = population._unpack_chromosomes(packed_chromosomes, header["population_size"],
+                                                                header["chromosome_length"])
+        population._known_fitnesses = header["fitnesses"]
+        population._generation_count = header["generation_count"]
+        population.set_break_condition(BreakCondition(header["break_condition"]), header["break_value"])
+        for condition, value in header["additional_break_conditions"]:
+            population.add_break_condition(BreakCondition(condition), value)
+        population.break_mode = BreakMode(header["break_mode"])
+        population._best_fitness = header["best_fitness"]
+        population._last_improvement_generation = header["last_improvement_generation"]
+        population.selection_method = SelectionMethod(header["selection_method"])
+        population.crossover_method = CrossoverMethod(header["crossover_method"])
+        population.replacement_method = ReplacementMethod(header["replacement_method"])
+        population.mutation_chance = header["mutation_chance"]
+        population.crossover_chance = header["crossover_chance"]
+        population.tournament_size = header["tournament_size"]
+        population.tournament_replacement = header["tournament_replacement"]
+        population.elite_count = header["elite_count"]
+        population.steady_state_count = header["steady_state_count"]
+        population.duplicate_handling = DuplicateHandling(header.get("duplicate_handling", "keep"))
+        population.duplicate_attempts = header.get("duplicate_attempts", 10)
+        population._max_fitnesses = header["max_fitnesses"]
+        population._avg_fitnesses = header["avg_fitnesses"]
+        population._evaluations_per_generation = header["evaluations_per_generation"]
+        population._seed = header["seed"]
+        population._set_random_state(header["random_state"])
+        population._resuming = True
+        return population
+
+    def _get_checkpoint_settings(self):
+        """Return any settings a subclass needs saved in a checkpoint, to be added to its header"""
+        return {}
+
+    def _set_checkpoint_settings(self, header):
+        """Restore the subclass settings of a checkpoint header, before its chromosomes are unpacked"""
+        pass
+
+    def _pack_chromosomes(self):
+        """Return the population as bytes, each chromosome first bit first and padded to a whole byte"""
+        number_of_bytes = (self._chromosome_length + 7)//8
+        padding = number_of_bytes * 8 - self._chromosome_length
+        return b"".join((bits_to_int(chromosome) << padding).to_bytes(number_of_bytes, "big")
+                        for chromosome in self.chromosomes)
+
+    def _unpack_chromosomes(self, packed_chromosomes, population_size, chromosome_length):
+        number_of_bytes = (chromosome_length + 7)//8
+        padding = number_of_bytes * 8 - chromosome_length
+        values = [int.from_bytes(packed_chromosomes[index:index + number_of_bytes], "big") >> padding
+                  for index in range(0, population_size * number_of_bytes, number_of_bytes)]
+        return self._make_chromosomes(values, chromosome_length)
+
+    def _get_random_state(self):
+        version, internal_state, gauss_next = self._random.getstate()
+        packed_state = struct.pack(">{}I".format(len(internal_state)), *internal_state)
+        return {"random": [version, base64.b64encode(packed_state).decode("ascii"), gauss_next]}
+
+    def _set_random_state(self, state):
+        version, packed_state, gauss_next = state["random"]
+        packed_state = base64.b64decode(packed_state)
+        self._random.setstate((version, struct.unpack(">{}I".format(len(packed_state)//4), packed_state), gauss_next))
+
+    def _report_simulation(self, max_fitnesses, avg_fitnesses, echo=True, plot=True):
+        """Print and/or plot the results of a simulation"""
         if echo:
             print("After {number_of_generations} generations:".format(
                 number_of_generations=self._generation_count))
@@ -239,6 +1192,9 @@ class Population():
                 maxes=self.fittest_chromosome[1]))
             print("Current Fittest: {fittest}".format(
                 fittest=self.fittest_chromosome[0]))
+            if self._profile_report is not None:
+                for name, phase in self._profile_report["phases"].items():
+                    print("{name:<16}{seconds:.4f}s\t{calls} calls".format(name=name, **phase))
 
         if plot:
             # Plot the results in a nice graph
@@ -255,9 +1211,6 @@ class Population():
             plt.xlabel("Generation")
             plt.show()
 
-        # if plot:
-        return [max_fitnesses, avg_fitnesses]
-
     """
         Getters and setters:
     """
@@ -290,18 +1243,23 @@ class Population():
         return self._chromosome_length
 
     def _get_average_fitness(self):
-        return sum([self.get_fitness(chromosome) for chromosome in self.chromosomes]) / len(self.chromosomes)
+        return sum(self._get_fitnesses()) / len(self.chromosomes)
 
     def _set_chromosomes(self, chromosome_list):
         self._chromosomes = [[int(chr) for chr in chromosome]
                              for chromosome in chromosome_list]
         self._set_chromosome_lenth(len(self._chromosomes[0]))
+        self._clear_fitness_table()
+        self._generation_evaluations = 0
 
     def _get_chromosomes(self):
         return self._chromosomes
 
     def _set_fitness_function(self, fitness_function):
         self._fitness_function = fitness_function
+        self._clear_fitness_table()
+        if self._fitness_cache is not None:
+            self._fitness_cache.clear()
 
     def _get_fitness_function(self):
         return self._fitness_function
@@ -331,20 +1289,208 @@ class Population():
                 list(self._selection_methods.keys())))
 
     def set_break_condition(self, condition_name, condition_value):
+        """Set the condition to stop simulating at, replacing any others"""
         if condition_name in self._break_conditions:
             #self._break_conditions[condition_name]["var"] = condition_value
             self._break_value = condition_value
             self._break_condition = condition_name
+            self._additional_break_conditions = []
+        else:
+            raise KeyError("Invalid condition name.\n\tMust be in {}".format(
+                list(self._break_conditions.keys())))
+
+    def add_break_condition(self, condition_name, condition_value):
+        """
+        Add another condition to stop simulating at. By default (BreakMode.ANY) the simulation stops
+        when any condition is met; with break_mode = BreakMode.ALL it stops once all of them are met.
+        e.g GENERATION 1000 or TIME 60 seconds, or STALL 50 generations and DIVERSITY at most 0.1
+        """
+        if condition_name in self._break_conditions:
+            self._additional_break_conditions.append((condition_name, condition_value))
         else:
             raise KeyError("Invalid condition name.\n\tMust be in {}".format(
                 list(self._break_conditions.keys())))
 
+    def _get_break_mode(self):
+        return self._break_mode
+
+    def _set_break_mode(self, mode):
+        if isinstance(mode, BreakMode):
+            self._break_mode = mode
+        else:
+            raise TypeError("Break mode is not recognised.\n\tMust be in {}".format(list(BreakMode)))
+
     def _get_selection_methods(self):
         return [key for key in self._selection_methods]
 
     def _get_crossover_methods(self):
         return [key for key in self._crossover_methods]
 
+    def _get_fitness_delta_function(self):
+        return self._fitness_delta_function
+
+    def _set_fitness_delta_function(self, delta_function):
+        """
+        Set a function (parent_fitness, changed_indices, chromosome) -> fitness that updates a
+        parent's fitness for the bits a child changed, or None to always evaluate children in full.
+        The delta function may return None for a child to have it evaluated in full.
+        """
+        if delta_function is None or callable(delta_function):
+            self._fitness_delta_function = delta_function
+        else:
+            raise TypeError("Fitness delta function must be callable or None.")
+
+    def _get_repair_function(self):
+        return self._repair_function
+
+    def _set_repair_function(self, repair_function):
+        """
+        Set a function chromosome -> chromosome applied to every child after crossover and mutation,
+        e.g to make infeasible children feasible, or None to leave children as they are.
+        The returned chromosome replaces the child, so its repaired genes are inherited.
+        """
+        if repair_function is None or callable(repair_function):
+            self._repair_function = repair_function
+        else:
+            raise TypeError("Repair function must be callable or None.")
+
+    def _get_delta_evaluations(self):
+        """Number of fitnesses updated by the fitness delta function instead of evaluated in full"""
+        return self._delta_evaluations
+
+    def _get_fitness_cache(self):
+        return self._fitness_cache
+
+    def _set_fitness_cache(self, cache):
+        """Set a FitnessCache to reuse fitness values across generations, or None to disable caching"""
+        if cache is None or isinstance(cache, FitnessCache):
+            self._fitness_cache = cache
+        else:
+            raise TypeError("Fitness cache must be a FitnessCache or None.")
+
+    def _get_tournament_size(self):
+        return self._tournament_size
+
+    def _set_tournament_size(self, size):
+        if isinstance(size, int) and size >= 1:
+            self._tournament_size = size
+        else:
+            raise ValueError("Tournament size must be an int of at least 1.")
+
+    def _get_tournament_replacement(self):
+        return self._tournament_replacement
+
+    def _set_tournament_replacement(self, replacement):
+        """If False, the contestants of each tournament are all different chromosomes"""
+        self._tournament_replacement = bool(replacement)
+
+    def _get_replacement_method(self):
+        return self._replacement_method
+
+    def _set_replacement_method(self, new_method):
+        if isinstance(new_method, ReplacementMethod):
+            self._replacement_method = new_method
+        else:
+            raise TypeError("Replacement method is not recognised.\n\tMust be in {}".format(
+                list(ReplacementMethod)))
+
+    def _get_elite_count(self):
+        return self._elite_count
+
+    def _set_elite_count(self, count):
+        """Number of the fittest chromosomes carried forward unchanged by generational replacement"""
+        if isinstance(count, int) and count >= 0:
+            self._elite_count = count
+        else:
+            raise ValueError("Elite count must be an int of at least 0.")
+
+    def _get_steady_state_count(self):
+        return self._steady_state_count
+
+    def _set_steady_state_count(self, count):
+        """Number of the least fit chromosomes replaced each generation by steady state replacement"""
+        if isinstance(count, int) and count >= 1:
+            self._steady_state_count = count
+        else:
+            raise ValueError("Steady state count must be an int of at least 1.")
+
+    def _get_duplicate_handling(self):
+        return self._duplicate_handling
+
+    def _set_duplicate_handling(self, handling):
+        """What to do with children that duplicate another chromosome of the new generation"""
+        if isinstance(handling, DuplicateHandling):
+            self._duplicate_handling = handling
+        else:
+            raise TypeError("Duplicate handling is not recognised.\n\tMust be in {}".format(list(DuplicateHandling)))
+
+    def _get_duplicate_attempts(self):
+        return self._duplicate_attempts
+
+    def _set_duplicate_attempts(self, attempts):
+        if isinstance(attempts, int) and attempts >= 1:
+            self._duplicate_attempts = attempts
+        else:
+            raise ValueError("Duplicate attempts must be an int of at least 1.")
+
+    def _get_generation_duplicates(self):
+        """Number of children replaced or re-mutated for being duplicates in the last generation"""
+        return self._generation_duplicates
+
+    def _get_async_concurrency(self):
+        return self._async_concurrency
+
+    def _set_async_concurrency(self, limit):
+        if isinstance(limit, int) and limit >= 1:
+            self._async_concurrency = limit
+        else:
+            raise ValueError("Async concurrency must be an int of at least 1.")
+
+    def _get_seed(self):
+        return self._seed
+
+    def _set_seed(self, seed):
+        """Re-seed the random number generator(s) owned by this population"""
+        self._seed = seed
+        self._random.seed(seed)
+
+    def spawn_seeds(self, count):
+        """Return x seeds drawn from this population's generator, e.g for independent parallel workers"""
+        return [self._random.getrandbits(64) for i in range(0, count)]
+
+    def _get_checkpoint_times(self):
+        """Seconds taken to write each checkpoint during simulations"""
+        return self._checkpoint_times
+
+    def _get_generation_evaluations(self):
+        """Number of fitness function calls made since the current population was assigned"""
+        return self._generation_evaluations
+
+    def _get_total_evaluations(self):
+        return self._total_evaluations
+
+    def _get_profile_mode(self):
+        return self._profile_mode
+
+    def _set_profile_mode(self, mode):
+        """
+        Choose how simulations are profiled. TIMERS times each phase of a generation (selection, crossover,
+        mutation, evaluation, ...), CPROFILE also records a cProfile of the run and TRACEMALLOC also traces
+        memory allocations. The results are in profile_report after each simulation.
+        """
+        if isinstance(mode, ProfileMode):
+            self._profile_mode = mode
+        else:
+            raise TypeError("Profile mode is not recognised.\n\tMust be in {}".format(list(ProfileMode)))
+
+    def _get_profile_report(self):
+        """The profile of the last simulation, as a dict, or None if it was not profiled"""
+        return self._profile_report
+
+    def _get_evaluations_per_generation(self):
+        """Number of fitness function calls made for each generation of the last simulation"""
+        return self._evaluations_per_generation
+
     chromosome_lenth = property(_get_chromosome_length, _set_chromosome_lenth)
     average_fitness = property(_get_average_fitness, None)
     mutation_chance = property(_get_mutation_chance, _set_mutation_chance)
@@ -356,3 +1502,26 @@ class Population():
     selection_method = property(_get_selection_method, _set_selection_method)
     selection_methods = property(_get_selection_methods)
     crossover_methods = property(_get_crossover_methods)
+    fitness_delta_function = property(_get_fitness_delta_function, _set_fitness_delta_function)
+    delta_evaluations = property(_get_delta_evaluations)
+    repair_function = property(_get_repair_function, _set_repair_function)
+    fitness_cache = property(_get_fitness_cache, _set_fitness_cache)
+    tournament_size = property(_get_tournament_size, _set_tournament_size)
+    tournament_replacement = property(_get_tournament_replacement, _set_tournament_replacement)
+    replacement_method = property(_get_replacement_method, _set_replacement_method)
+    elite_count = property(_get_elite_count, _set_elite_count)
+    steady_state_count = property(_get_steady_state_count, _set_steady_state_count)
+    async_concurrency = property(_get_async_concurrency, _set_async_concurrency)
+    seed = property(_get_seed, _set_seed)
+    break_mode = property(_get_break_mode, _set_break_mode)
+    diversity = property(_get_diversity)
+    locus_diversity = property(_get_locus_diversity)
+    duplicate_handling = property(_get_duplicate_handling, _set_duplicate_handling)
+    duplicate_attempts = property(_get_duplicate_attempts, _set_duplicate_attempts)
+    generation_duplicates = property(_get_generation_duplicates)
+    checkpoint_times = property(_get_checkpoint_times)
+    generation_evaluations = property(_get_generation_evaluations)
+    total_evaluations = property(_get_total_evaluations)
+    evaluations_per_generation = property(_get_evaluations_per_generation)
+    profile_mode = property(_get_profile_mode, _set_profile_mode)
+    profile_report = property(_get_profile_report)
@@ -1,5 +1,6 @@
-from Genetic import Population
+from Genetic import Population, BreakCondition
 from ExampleUsage import ExampleProblems
+from Sweep import make_grid, run_sweep
 from threading import Thread
 from tkinter import *
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2TkAgg
@@ -65,23 +66,18 @@ class Window(Frame):
         box = a.get_position()
         a.set_position([box.x0, box.y0, box.width * 0.6, box.height])
 
-        total_methods = len(pop.selection_methods) * len(pop.crossover_methods)
+        # Run every selection x crossover combination in parallel, plotting each as it finishes
+        grid = make_grid(selection_method=pop.selection_methods, crossover_method=pop.crossover_methods)
+        total_methods = len(grid)
         current_method_count = 0
-        for sm in pop.selection_methods:
-            for cm in pop.crossover_methods:
-                self._update_loading_label("{:.0f}%".format(current_method_count/total_methods*100))
-                pop = Population()
-                pop.chromosomes = start_sample
-                pop.fitness_function = self.problems.problems[self.chosen_problem.get().lower()]
-                pop.selection_method = sm
-                pop.crossover_method = cm
-                pop.set_break_condition("generation", int(self.generation_entry.get()))
-                pmax, pavg =pop.simulate(plot=False, echo=True)
-
-                a.plot(pmax, linewidth=2, label="{}, {} [{:.0f}]".format(sm, cm, pop.fittest_chromosome[1]))
-
-                current_method_count += 1
+        self._update_loading_label("{:.0f}%".format(0))
+        for result in run_sweep(self.problems.problems[self.chosen_problem.get().lower()], grid,
+                                generations=int(self.generation_entry.get()), chromosomes=start_sample):
+            sm, cm = result["selection_method"], result["crossover_method"]
+            a.plot(result["max_fitnesses"], linewidth=2, label="{}, {} [{:.0f}]".format(sm, cm, result["best_fitness"]))
 
+            current_method_count += 1
+            self._update_loading_label("{:.0f}%".format(current_method_count/total_methods*100))
 
         a.set_title("{}".format(self.chosen_problem.get()))
         handles, labels = a.get_legend_handles_labels()
@@ -230,10 +226,10 @@ class GenerationStepThroughWindow(Frame):
 
         self.toggle_input("disabled")
 
-        self.population.set_break_condition("generation", number_of_generations)
-        s_max, s_avgs = self.population.simulate(echo=True, plot=False)
-        self.max_fitnesses = self.max_fitnesses + s_max
-        self.average_fitnesses = self.average_fitnesses + s_avgs
+        self.population.set_break_condition(BreakCondition.GENERATION, number_of_generations)
+        for record in self.population.evolve(echo=True):
+            self.max_fitnesses.append(record.best)
+            self.average_fitnesses.append(record.mean)
 
         self.make_fitness_graph(self.fitness_graph_container)
         self.make_chromosome_graph(self.chromosome_graph_container)
@@ -0,0 +1,174 @@
+import struct
+from array import array
+from collections import Counter
+from enum import Enum
+
+from Genetic import Population
+
+
+class MutationMethod(Enum):
+    UNIFORM_RESET = "uniform_reset"
+    CREEP = "creep"
+
+
+def _smallest_typecode(gene_ranges):
+    """Return the smallest signed array typecode that can hold every gene range"""
+    for typecode in "bhiq":
+        bits = array(typecode).itemsize * 8
+        if all(-2 ** (bits - 1) <= low and high < 2 ** (bits - 1) for low, high in gene_ranges):
+            return typecode
+    raise ValueError("Gene ranges must fit in a 64 bit integer.")
+
+
+class IntegerPopulation(Population):
+    """
+    A Population whose chromosomes are integer genes, each within its own inclusive range,
+    stored in a compact array. A problem's parameters can each be mapped onto one gene,
+    rather than encoded as bits and decoded back, so no codes are wasted on out of range values.
+    Mutation either resets a random gene to any value in its range, or creeps it up or down a little.
+    """
+
+    def __init__(self, seed=None):
+        Population.__init__(self, seed)
+        self._gene_ranges = []
+        self._typecode = "q"
+        self._mutation_method = MutationMethod.UNIFORM_RESET
+        self._creep_size = 1
+
+    def set_problem(self, problem):
+        """Map each parameter of a Problem onto a gene and score chromosomes with the problem's score function"""
+        self.gene_ranges = problem.gene_ranges
+        self.fitness_function = problem.score_genes
+
+    def generate_random_sample(self, number_of_samples, chromosome_length=None):
+        """Generate a random sample of chromosomes, one random gene for each gene range"""
+        if chromosome_length is not None and chromosome_length != len(self._gene_ranges):
+            raise ValueError("Chromosome length must match the {} gene ranges.".format(len(self._gene_ranges)))
+        for sample in range(0, number_of_samples):
+            yield array(self._typecode, [self._random.randint(low, high) for low, high in self._gene_ranges])
+
+    def _fixed_common_feature_crossover(self, chr1, chr2):
+        """Keep the genes shared by both parents and randomise the rest within their ranges"""
+        chr3 = array(self._typecode, chr1)
+        chr4 = array(self._typecode, chr1)
+        for index, (c1, c2) in enumerate(zip(chr1, chr2)):
+            if c1 != c2:
+                low, high = self._gene_ranges[index]
+                chr3[index] = self._random.randint(low, high)
+                chr4[index] = self._random.randint(low, high)
+        yield chr3
+        yield chr4
+
+    def _mutate(self, chromosome):
+        """Reset or creep a random gene of a chromosome with a given probability"""
+        if self._random.random() <= self.mutation_chance:
+            index = self._random.randrange(0, len(chromosome))
+            low, high = self._gene_ranges[index]
+            if self._mutation_method == MutationMethod.CREEP:
+                step = self._random.randint(1, self._creep_size) * self._random.choice((-1, 1))
+                chromosome[index] = min(high, max(low, chromosome[index] + step))
+            else:
+                chromosome[index] = self._random.randint(low, high)
+        return chromosome
+
+    def _copy_chromosome(self, chromosome):
+        return array(self._typecode, chromosome)
+
+    def _to_chromosome(self, sequence):
+        return array(self._typecode, sequence)
+
+    def _chromosome_key(self, chromosome):
+        return chromosome.tobytes()
+
+    def _locus_counts(self, chromosomes):
+        for column in zip(*chromosomes):
+            yield Counter(column).values()
+
+    def _make_chromosomes(self, values, chromosome_length):
+        """Return the chromosomes numbered by the given values, counting through the gene ranges with the last gene fastest"""
+        chromosomes = []
+        for value in values:
+            genes = []
+            for low, high in reversed(self._gene_ranges):
+                value, gene = divmod(value, high - low + 1)
+                genes.append(low + gene)
+            chromosomes.append(array(self._typecode, reversed(genes)))
+        return chromosomes
+
+    def _chromosome_value(self, chromosome):
+        value = 0
+        for gene, (low, high) in zip(chromosome, self._gene_ranges):
+            value = value * (high - low + 1) + gene - low
+        return value
+
+    def _count_possibilities(self, chromosome_length):
+        count = 1
+        for low, high in self._gene_ranges:
+            count *= high - low + 1
+        return count
+
+    def _get_checkpoint_settings(self):
+        return {"gene_ranges": self._gene_ranges, "mutation_method": self._mutation_method.value,
+                "creep_size": self._creep_size}
+
+    def _set_checkpoint_settings(self, header):
+        self.gene_ranges = header["gene_ranges"]
+        self.mutation_method = MutationMethod(header["mutation_method"])
+        self.creep_size = header["creep_size"]
+
+    def _pack_chromosomes(self):
+        genes = [gene for chromosome in self.chromosomes for gene in chromosome]
+        return struct.pack(">{}q".format(len(genes)), *genes)
+
+    def _unpack_chromosomes(self, packed_chromosomes, population_size, chromosome_length):
+        genes = struct.unpack(">{}q".format(population_size * chromosome_length), packed_chromosomes)
+        return [genes[index:index + chromosome_length]
+                for index in range(0, population_size * chromosome_length, chromosome_length)]
+
+    def _set_chromosomes(self, chromosome_list):
+        if not self._gene_ranges:
+            raise ValueError("Gene ranges must be set before the chromosomes.")
+        chromosome_list = list(chromosome_list)
+        for chromosome in chromosome_list:
+            if len(chromosome) != len(self._gene_ranges):
+                raise ValueError("Chromosome length must match the {} gene ranges.".format(len(self._gene_ranges)))
+            for index, (gene, (low, high)) in enumerate(zip(chromosome, self._gene_ranges)):
+                if not low <= gene <= high:
+                    raise ValueError("Gene {} is {}.\n\tMust be in [{}, {}]".format(index, gene, low, high))
+        self._chromosomes = [array(self._typecode, chromosome) for chromosome in chromosome_list]
+        self._set_chromosome_lenth(len(self._chromosomes[0]))
+        self._clear_fitness_table()
+        self._generation_evaluations = 0
+
+    def _get_gene_ranges(self):
+        return self._gene_ranges
+
+    def _set_gene_ranges(self, gene_ranges):
+        gene_ranges = [(int(low), int(high)) for low, high in gene_ranges]
+        if any(low > high for low, high in gene_ranges):
+            raise ValueError("Each gene range must be (lowest, highest) with lowest <= highest.")
+        self._gene_ranges = gene_ranges
+        self._typecode = _smallest_typecode(gene_ranges)
+
+    def _get_mutation_method(self):
+        return self._mutation_method
+
+    def _set_mutation_method(self, method):
+        if isinstance(method, MutationMethod):
+            self._mutation_method = method
+        else:
+            raise TypeError("Mutation method is not recognised.\n\tMust be in {}".format(list(MutationMethod)))
+
+    def _get_creep_size(self):
+        return self._creep_size
+
+    def _set_creep_size(self, size):
+        if isinstance(size, int) and size >= 1:
+            self._creep_size = size
+        else:
+            raise ValueError("Creep size must be an int of at least 1.")
+
+    chromosomes = property(Population._get_chromosomes, _set_chromosomes)
+    gene_ranges = property(_get_gene_ranges, _set_gene_ranges)
+    mutation_method = property(_get_mutation_method, _set_mutation_method)
+    creep_size = property(_get_creep_size, _set_creep_size)
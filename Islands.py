@@ -0,0 +1,228 @@
+import multiprocessing
+import time
+from enum import Enum
+
+from Genetic import Population, BreakCondition
+
+
+class Topology(Enum):
+    RING = "ring"
+    FULLY_CONNECTED = "fully_connected"
+
+
+def _run_island(connection, population_class, settings, seed):
+    """Worker process: hold one island's population and evolve it on request"""
+    population = population_class(seed=seed)
+    for name, value in settings.items():
+        setattr(population, name, value)
+
+    while True:
+        command, argument = connection.recv()
+        if command == "evolve":
+            max_fitnesses = []
+            avg_fitnesses = []
+            for generation in range(0, argument):
+                population.next_generation()
+                max_fitnesses.append(population.fittest_chromosome[1])
+                avg_fitnesses.append(population.average_fitness)
+            connection.send((max_fitnesses, avg_fitnesses, population.total_evaluations))
+        elif command == "emigrate":
+            connection.send(population.get_fittest(argument))
+        elif command == "immigrate":
+            population.immigrate(*argument)
+            connection.send(None)
+        elif command == "stop":
+            connection.send(population.get_fittest(1)[0])
+            connection.close()
+            return
+
+
+class IslandModel():
+    """
+    Evolve several populations (islands) side by side, each in its own worker process.
+    Every migration_interval generations, the migration_count fittest chromosomes of each island
+    replace the least fit chromosomes of its neighbours in the migration topology.
+    """
+
+    def __init__(self, fitness_function, population_class=Population, seed=None):
+        self._fitness_function = fitness_function
+        self._population_class = population_class
+        self._seeder = Population(seed=seed)
+        self._islands = []
+        self._migration_interval = 10
+        self._migration_count = 2
+        self._topology = Topology.RING
+        self._break_condition = BreakCondition.GENERATION
+        self._break_value = 100
+        self._generation_count = 0
+        self._total_evaluations = 0
+        self._fittest_chromosome = None
+        self._simulation_start_time = None
+
+    def add_island(self, chromosomes, **settings):
+        """
+        Add an island with a starting population. Any other Population property can be set
+        per island by keyword, e.g selection_method=SelectionMethod.ROULETTE, mutation_chance=0.1
+        """
+        for name in settings:
+            if not isinstance(getattr(self._population_class, name, None), property):
+                raise KeyError("{} is not a Population property.".format(name))
+        settings["chromosomes"] = [list(chromosome) for chromosome in chromosomes]
+        settings["fitness_function"] = self._fitness_function
+        self._islands.append(settings)
+
+    def set_break_condition(self, condition_name, condition_value):
+        """Set the condition to stop simulating at. Every BreakCondition except DIVERSITY is supported."""
+        if isinstance(condition_name, BreakCondition) and condition_name != BreakCondition.DIVERSITY:
+            self._break_value = condition_value
+            self._break_condition = condition_name
+        else:
+            raise KeyError("Invalid condition name.\n\tMust be in {}".format(
+                [condition for condition in BreakCondition if condition != BreakCondition.DIVERSITY]))
+
+    def _has_reached_break_generation(self, max_fitnesses):
+        if self._break_condition == BreakCondition.FITNESS:
+            return bool(max_fitnesses) and max_fitnesses[-1] >= self._break_value
+        if self._break_condition == BreakCondition.STALL:
+            if not max_fitnesses:
+                return False
+            best_generation = max(range(0, len(max_fitnesses)), key=lambda generation: max_fitnesses[generation])
+            return len(max_fitnesses) - 1 - best_generation >= self._break_value
+        if self._break_condition == BreakCondition.TIME:
+            return time.perf_counter() - self._simulation_start_time >= self._break_value
+        if self._break_condition == BreakCondition.EVALUATIONS:
+            return self._total_evaluations >= self._break_value
+        return self._generation_count >= self._break_value
+
+    def _neighbours(self, island_index):
+        """Return the indices of the islands that send migrants to a given island"""
+        if self._topology == Topology.RING:
+            return [(island_index - 1) % len(self._islands)]
+        return [index for index in range(0, len(self._islands)) if index != island_index]
+
+    def _migrate(self, connections):
+        emigrants = []
+        for connection in connections:
+            connection.send(("emigrate", self._migration_count))
+        for connection in connections:
+            emigrants.append(connection.recv())
+
+        for island_index, connection in enumerate(connections):
+            arrivals = [migrant for neighbour in self._neighbours(island_index) for migrant in emigrants[neighbour]]
+            arrivals = sorted(arrivals, key=lambda x: x[1], reverse=True)[:self._migration_count]
+            connection.send(("immigrate", ([chromosome for chromosome, fitness in arrivals],
+                                           [fitness for chromosome, fitness in arrivals])))
+        for connection in connections:
+            connection.recv()
+
+    def simulate(self, echo=True, plot=False):
+        """
+        Evolve every island until the break condition is met and return the combined
+        [max_fitnesses, avg_fitnesses] for each generation, as Population.simulate does.
+        Breaking on anything other than generation count is checked between migrations.
+        """
+        if len(self._islands) < 2:
+            raise ValueError("An island model needs at least 2 islands.")
+        seeds = self._seeder.spawn_seeds(len(self._islands))
+        island_sizes = [len(island["chromosomes"]) for island in self._islands]
+        connections = []
+        processes = []
+        for island, seed in zip(self._islands, seeds):
+            connection, worker_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_run_island, daemon=True,
+                                              args=(worker_connection, self._population_class, island, seed))
+            process.start()
+            connections.append(connection)
+            processes.append(process)
+
+        max_fitnesses = []
+        avg_fitnesses = []
+        self._generation_count = 0
+        self._total_evaluations = 0
+        self._simulation_start_time = time.perf_counter()
+        try:
+            while not self._has_reached_break_generation(max_fitnesses):
+                generations = self._migration_interval
+                if self._break_condition == BreakCondition.GENERATION:
+                    generations = min(generations, self._break_value - self._generation_count)
+                for connection in connections:
+                    connection.send(("evolve", generations))
+                results = [connection.recv() for connection in connections]
+
+                for generation in range(0, generations):
+                    max_fitnesses.append(max(result[0][generation] for result in results))
+                    avg_fitnesses.append(sum(result[1][generation] * size for result, size in zip(results, island_sizes))
+                                         / sum(island_sizes))
+                self._total_evaluations = sum(result[2] for result in results)
+                self._generation_count += generations
+                if echo:
+                    print("generation {}\tmax fitness {}".format(self._generation_count, max_fitnesses[-1]), end="\r")
+
+                if not self._has_reached_break_generation(max_fitnesses):
+                    self._migrate(connections)
+
+            for connection in connections:
+                connection.send(("stop", None))
+            self._fittest_chromosome = max((connection.recv() for connection in connections), key=lambda x: x[1])
+        finally:
+            for process in processes:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+
+        if echo:
+            print("After {} generations on {} islands:".format(self._generation_count, len(self._islands)))
+            print("Current Max Fitness: {}".format(self._fittest_chromosome[1]))
+            print("Current Fittest: {}".format(self._fittest_chromosome[0]))
+        if plot:
+            import matplotlib.pyplot as plt
+            plt.plot(max_fitnesses, linewidth=3, color='c', label="Max Fitness")
+            plt.plot(avg_fitnesses, linewidth=2, color='y', label="Avg Fitness")
+            plt.legend(loc=0)
+            plt.ylabel("Fitness")
+            plt.xlabel("Generation")
+            plt.show()
+        return [max_fitnesses, avg_fitnesses]
+
+    """
+        Getters and setters:
+    """
+
+    def _get_migration_interval(self):
+        return self._migration_interval
+
+    def _set_migration_interval(self, interval):
+        if isinstance(interval, int) and interval >= 1:
+            self._migration_interval = interval
+        else:
+            raise ValueError("Migration interval must be an int of at least 1.")
+
+    def _get_migration_count(self):
+        return self._migration_count
+
+    def _set_migration_count(self, count):
+        if isinstance(count, int) and count >= 0:
+            self._migration_count = count
+        else:
+            raise ValueError("Migration count must be an int of at least 0.")
+
+    def _get_topology(self):
+        return self._topology
+
+    def _set_topology(self, topology):
+        if isinstance(topology, Topology):
+            self._topology = topology
+        else:
+            raise TypeError("Topology is not recognised.\n\tMust be in {}".format(list(Topology)))
+
+    def _get_fittest_chromosome(self):
+        return self._fittest_chromosome
+
+    def _get_total_evaluations(self):
+        return self._total_evaluations
+
+    migration_interval = property(_get_migration_interval, _set_migration_interval)
+    migration_count = property(_get_migration_count, _set_migration_count)
+    topology = property(_get_topology, _set_topology)
+    fittest_chromosome = property(_get_fittest_chromosome)
+    total_evaluations = property(_get_total_evaluations)
@@ -0,0 +1,240 @@
+import inspect
+
+import numpy as np
+
+from Genetic import Population, SelectionMethod, CrossoverMethod, is_batch_fitness
+
+
+class NumpyPopulation(Population):
+    """
+    A Population that stores every chromosome as a row of a single 2-D uint8 array.
+    Selection, crossover and mutation are carried out as batched array operations
+    over the whole generation, so large populations of long chromosomes stay practical.
+    Fitness functions still receive each chromosome as a list of ints, while
+    batch fitness functions receive the population array itself.
+    """
+
+    def __init__(self, seed=None):
+        Population.__init__(self, seed)
+        self._rng = np.random.default_rng(seed)
+
+        self._selection_methods = {
+            SelectionMethod.CUTOFF: self._cutoff_selection,
+            SelectionMethod.ROULETTE: self._roulette_selection,
+            SelectionMethod.TOURNAMENT: self._tournament_selection,
+        }
+        self._crossover_methods = {
+            CrossoverMethod.ONE_POINT: self._random_single_point_crossover,
+            CrossoverMethod.TWO_POINT: self._random_two_point_crossover,
+            CrossoverMethod.FIXED_COMMON: self._fixed_common_feature_crossover,
+        }
+
+    def _cutoff_selection(self, num_to_select=2):
+        """Return the indices of x chromosomes chosen uniformly from the fittest half of the population"""
+        prev_generation_size = len(self.chromosomes)
+        cutoff = prev_generation_size//2
+        fittest_first = np.argsort(-self._get_fitness_array(), kind="stable")
+        return fittest_first[self._rng.integers(0, prev_generation_size - cutoff, num_to_select)]
+
+    def _roulette_selection(self, num_to_select=2):
+        """Return the indices of x chromosomes chosen with probability proportional to fitness"""
+        cumulative_fitnesses = self._get_cumulative_fitnesses()
+        total_fitness = cumulative_fitnesses[-1]
+        if total_fitness <= 0:
+            return self._rng.integers(0, len(cumulative_fitnesses), num_to_select)
+        indices = np.searchsorted(cumulative_fitnesses, self._rng.random(num_to_select) * total_fitness, side="right")
+        return np.minimum(indices, len(cumulative_fitnesses) - 1)
+
+    def _get_cumulative_fitnesses(self):
+        """Return the running total of fitness in population order, built once per generation"""
+        if self._cumulative_fitnesses is None:
+            self._cumulative_fitnesses = np.cumsum(self._get_fitness_array())
+        return self._cumulative_fitnesses
+
+    def _tournament_selection(self, num_to_select=2):
+        """Return the indices of the winners of x tournaments between tournament_size random chromosomes"""
+        fitnesses = self._get_fitness_array()
+        population_size = len(fitnesses)
+        tournament_size = min(self._tournament_size, population_size)
+        if self._tournament_replacement:
+            contestants = self._rng.integers(0, population_size, (num_to_select, tournament_size))
+        elif tournament_size * 2 > population_size:
+            # Large tournaments: shuffle the population for every tournament
+            contestants = self._rng.random((num_to_select, population_size)).argsort(axis=1)[:, :tournament_size]
+        else:
+            # Small tournaments: redraw the tournaments that picked a contestant twice
+            contestants = self._rng.integers(0, population_size, (num_to_select, tournament_size))
+            while True:
+                sorted_contestants = np.sort(contestants, axis=1)
+                repeated = (sorted_contestants[:, 1:] == sorted_contestants[:, :-1]).any(axis=1)
+                if not repeated.any():
+                    break
+                contestants[repeated] = self._rng.integers(0, population_size, (repeated.sum(), tournament_size))
+        winners = fitnesses[contestants].argmax(axis=1)
+        return contestants[np.arange(num_to_select), winners]
+
+    def get_fitness(self, chromosome):
+        """Get the fitness of a given chromosome based on the population fitness function, with a minimum of 0."""
+        return self._evaluate_chromosomes(np.asarray(chromosome, dtype=np.uint8)[np.newaxis])[0]
+
+    def _score_chromosomes(self, chromosomes):
+        """Call the fitness function on the given chromosome rows, once per row or once for a batch fitness function"""
+        if is_batch_fitness(self.fitness_function):
+            self._generation_evaluations += len(chromosomes)
+            self._total_evaluations += len(chromosomes)
+            return np.maximum(0, np.asarray(self.fitness_function(chromosomes))).tolist()
+        return Population._score_chromosomes(self, chromosomes.tolist())
+
+    async def _score_chromosomes_async(self, chromosomes):
+        """Await an async fitness function on the given chromosome rows concurrently"""
+        if is_batch_fitness(self.fitness_function) or not inspect.iscoroutinefunction(self.fitness_function):
+            return self._score_chromosomes(chromosomes)
+        return await Population._score_chromosomes_async(self, np.asarray(chromosomes).tolist())
+
+    def _take_chromosomes(self, chromosomes, indices):
+        return chromosomes[indices]
+
+    def _get_fitness_array(self):
+        return np.asarray(self._get_fitnesses(), dtype=float)
+
+    def _get_fitness_statistics(self):
+        fitnesses = self._get_fitness_array()
+        return self._get_fitnesses()[int(fitnesses.argmax())], float(fitnesses.mean()), float(fitnesses.std())
+
+    def generate_random_sample(self, number_of_samples, chromosome_length):
+        """Generate a random sample of chromosomes of a given length, as a 2-D array"""
+        return self._rng.integers(0, 2, (number_of_samples, chromosome_length), dtype=np.uint8)
+
+    def _make_chromosomes(self, values, chromosome_length):
+        """Return the rows whose bits are the binary representations of the given values"""
+        shifts = np.arange(chromosome_length - 1, -1, -1, dtype=np.uint64)
+        values = np.asarray(values, dtype=np.uint64).reshape(-1, 1)
+        return ((values >> shifts) & np.uint64(1)).astype(np.uint8)
+
+    def _set_seed(self, seed):
+        """Re-seed the random number generators owned by this population"""
+        Population._set_seed(self, seed)
+        self._rng = np.random.default_rng(seed)
+
+    def spawn_seeds(self, count):
+        """Return x seeds for independent streams, spawned from this population's generator"""
+        return [int(seed) for seed in self._rng.integers(0, 2 ** 63, count)]
+
+    def _chromosome_key(self, chromosome):
+        return chromosome.tobytes()
+
+    def _locus_counts(self, chromosomes):
+        ones = chromosomes.sum(axis=0, dtype=np.int64)
+        return np.stack([ones, len(chromosomes) - ones], axis=1).tolist()
+
+    def _pack_chromosomes(self):
+        return np.packbits(self.chromosomes, axis=1).tobytes()
+
+    def _unpack_chromosomes(self, packed_chromosomes, population_size, chromosome_length):
+        packed = np.frombuffer(packed_chromosomes, dtype=np.uint8).reshape(population_size, -1)
+        return np.unpackbits(packed, axis=1, count=chromosome_length)
+
+    def _get_random_state(self):
+        state = Population._get_random_state(self)
+        state["numpy"] = self._rng.bit_generator.state
+        return state
+
+    def _set_random_state(self, state):
+        Population._set_random_state(self, state)
+        self._rng.bit_generator.state = state["numpy"]
+
+    def crossover(self, chr1, chr2):
+        """Do the selected crossover with the selected crossover chance"""
+        parents_1 = np.asarray(chr1, dtype=np.uint8)[np.newaxis]
+        parents_2 = np.asarray(chr2, dtype=np.uint8)[np.newaxis]
+        for children in self._crossover_all(parents_1, parents_2):
+            yield children[0]
+
+    def _crossover_all(self, parents_1, parents_2):
+        """Cross over each pair of parent rows with the selected crossover chance"""
+        children_1, children_2 = self._crossover_methods[self._crossover_method](parents_1, parents_2)
+        keep_parents = (self._rng.random(len(parents_1)) > self._crossover_chance)[:, np.newaxis]
+        return np.where(keep_parents, parents_1, children_1), np.where(keep_parents, parents_2, children_2)
+
+    def _random_single_point_crossover(self, parents_1, parents_2):
+        """Cross over each pair of parent rows at its own random point"""
+        crossover_points = self._rng.integers(0, parents_1.shape[1], (len(parents_1), 1))
+        from_first = np.arange(parents_1.shape[1]) < crossover_points
+        return np.where(from_first, parents_1, parents_2), np.where(from_first, parents_2, parents_1)
+
+    def _random_two_point_crossover(self, parents_1, parents_2):
+        """Swap a random section between each pair of parent rows"""
+        crossover_points = np.sort(self._rng.integers(0, parents_1.shape[1], (len(parents_1), 2)), axis=1)
+        columns = np.arange(parents_1.shape[1])
+        swapped = (columns >= crossover_points[:, :1]) & (columns < crossover_points[:, 1:])
+        return np.where(swapped, parents_2, parents_1), np.where(swapped, parents_1, parents_2)
+
+    def _fixed_common_feature_crossover(self, parents_1, parents_2):
+        """Keep the bits shared by both parents and randomise the rest"""
+        common = parents_1 == parents_2
+        random_bits = self._rng.integers(0, 2, (2,) + parents_1.shape, dtype=np.uint8)
+        return np.where(common, parents_1, random_bits[0]), np.where(common, parents_1, random_bits[1])
+
+    def _mutate(self, chromosome):
+        """Flip a random bit of a chromosome with a given probability"""
+        return self._mutate_all(np.asarray(chromosome, dtype=np.uint8)[np.newaxis])[0]
+
+    def _mutate_all(self, chromosomes):
+        """Flip a random bit of each chromosome row with a given probability"""
+        mutated = np.flatnonzero(self._rng.random(len(chromosomes)) <= self.mutation_chance)
+        flip_indices = self._rng.integers(0, chromosomes.shape[1], len(mutated))
+        chromosomes[mutated, flip_indices] ^= 1
+        return chromosomes
+
+    def _get_survivors(self):
+        """Return the fittest rows to carry forward, as (chromosome, fitness) tuples"""
+        fitnesses = self._get_fitnesses()
+        survivors = np.argsort(-self._get_fitness_array(), kind="stable")[:self._get_survivor_count()]
+        return [(self.chromosomes[index], fitnesses[index]) for index in survivors]
+
+    def _breed(self, number_of_children):
+        """
+        Make new chromosome rows by selection, crossover and mutation of the current population.
+        Returns arrays of the children, the parent each child was mostly copied from, and that parent's fitness.
+        """
+        number_of_pairs = (number_of_children + 1)//2
+
+        with self._phase("selection"):
+            parent_indices = self._selection_methods[self._selection_method](2 * number_of_pairs)
+            parents = self.chromosomes[parent_indices]
+        with self._phase("crossover"):
+            children_1, children_2 = self._crossover_all(parents[0::2], parents[1::2])
+
+            new_generation = np.empty_like(parents)
+            new_generation[0::2] = children_1
+            new_generation[1::2] = children_2
+
+        parent_fitnesses = [self._get_fitnesses()[index] for index in parent_indices[:number_of_children]]
+        with self._phase("mutation"):
+            children = self._mutate_all(new_generation[:number_of_children])
+        return children, parents[:number_of_children], parent_fitnesses
+
+    def _to_chromosome(self, sequence):
+        return np.asarray(sequence, dtype=np.uint8)
+
+    def _join_generation(self, survivors, children):
+        survivor_rows = np.array(survivors, dtype=np.uint8).reshape(-1, self.chromosomes.shape[1])
+        return np.concatenate([survivor_rows, children])
+
+    def _changed_indices(self, parent, child):
+        """Return the positions at which a child row differs from its parent row"""
+        return np.flatnonzero(parent != child).tolist()
+
+    def _set_chromosomes(self, chromosome_list):
+        if not isinstance(chromosome_list, np.ndarray):
+            chromosome_list = [list(chromosome) for chromosome in chromosome_list]
+        chromosomes = np.array(chromosome_list, dtype=np.uint8)
+        if chromosomes.ndim != 2:
+            raise ValueError("Chromosomes must all have the same length.")
+        self._chromosomes = chromosomes
+        self._set_chromosome_lenth(chromosomes.shape[1])
+        self._clear_fitness_table()
+        self._generation_evaluations = 0
+
+    chromosomes = property(Population._get_chromosomes, _set_chromosomes)
+    seed = property(Population._get_seed, _set_seed)
@@ -0,0 +1,194 @@
+from itertools import chain, islice
+
+from Genetic import Population
+
+# The 8 bits of every byte value, first bit most significant, to unpack a chromosome a byte at a time
+_BYTE_BITS = [tuple((byte >> shift) & 1 for shift in range(7, -1, -1)) for byte in range(256)]
+
+
+class BitChromosome():
+    """
+    An immutable chromosome of bits packed into a single Python int, first bit most significant.
+    It behaves like a read-only list of 0s and 1s, so list based fitness functions work unchanged,
+    while crossover, mutation, popcount and decoding are done with integer bit operations.
+    """
+    __slots__ = ("_value", "_length")
+
+    def __init__(self, value=0, length=0):
+        self._value = value
+        self._length = length
+
+    @classmethod
+    def from_bits(cls, bits):
+        """Pack a sequence of bits, e.g [0,1,0,1,1]"""
+        if isinstance(bits, cls):
+            return bits
+        value = 0
+        length = 0
+        for bit in bits:
+            value = (value << 1) | int(bit)
+            length += 1
+        return cls(value, length)
+
+    def to_int(self):
+        """Return the bits as an integer, e.g [0,1,0,1,1] -> 11"""
+        return self._value
+
+    def _bytes(self):
+        """Return the bits as big endian bytes, padded with 0s after the last bit to a whole byte"""
+        padding = -self._length % 8
+        return (self._value << padding).to_bytes((self._length + padding) // 8, "big")
+
+    def tolist(self):
+        bits = list(chain.from_iterable(_BYTE_BITS[byte] for byte in self._bytes()))
+        del bits[self._length:]
+        return bits
+
+    def popcount(self):
+        """Return the number of bits that are set"""
+        return bin(self._value).count("1")
+
+    def flip(self, index):
+        """Return a copy of this chromosome with one bit flipped"""
+        return BitChromosome(self._value ^ (1 << (self._length - 1 - index)), self._length)
+
+    def _mask(self, start, stop):
+        """Return a mask selecting the bits from index start up to (not including) index stop"""
+        return ((1 << (stop - start)) - 1) << (self._length - stop)
+
+    def splice(self, other, mask):
+        """Return a chromosome with the masked bits taken from other, and the rest from this chromosome"""
+        return BitChromosome((self._value & ~mask) | (other._value & mask), self._length)
+
+    def changed_indices(self, other):
+        """Return the indices at which two chromosomes differ"""
+        difference = self._value ^ other._value
+        indices = []
+        while difference:
+            lowest_bit = difference & -difference
+            indices.append(self._length - lowest_bit.bit_length())
+            difference ^= lowest_bit
+        return indices[::-1]
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        return islice(chain.from_iterable(_BYTE_BITS[byte] for byte in self._bytes()), self._length)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._length)
+            if step != 1:
+                return BitChromosome.from_bits(self.tolist()[index])
+            stop = max(start, stop)
+            return BitChromosome((self._value & self._mask(start, stop)) >> (self._length - stop), stop - start)
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("Chromosome index out of range.")
+        return (self._value >> (self._length - 1 - index)) & 1
+
+    def __add__(self, other):
+        other = BitChromosome.from_bits(other)
+        return BitChromosome((self._value << other._length) | other._value, self._length + other._length)
+
+    def __eq__(self, other):
+        """Equal to another BitChromosome, or to any other sequence of the same bits, e.g [0,1,1] or a numpy row"""
+        if isinstance(other, BitChromosome):
+            return self._value == other._value and self._length == other._length
+        if isinstance(other, (str, bytes)):
+            return NotImplemented
+        try:
+            if len(other) != self._length:
+                return False
+        except TypeError:
+            return NotImplemented
+        return self.tolist() == list(other)
+
+    def __hash__(self):
+        return hash((self._value, self._length))
+
+    def __repr__(self):
+        return "BitChromosome({})".format("".join(str(bit) for bit in self.tolist()))
+
+
+class PackedPopulation(Population):
+    """
+    A Population that stores every chromosome as a BitChromosome.
+    Memory use per chromosome is a fraction of a list of ints, crossover is done with bit masks
+    and mutation with XOR, and fitness functions still see each chromosome as a sequence of bits.
+    """
+
+    def generate_random_sample(self, number_of_samples, chromosome_length):
+        """Generate a random sample of chromosomes of a given length"""
+        for sample in range(0, number_of_samples):
+            yield BitChromosome(self._random.getrandbits(chromosome_length), chromosome_length)
+
+    def _make_chromosomes(self, values, chromosome_length):
+        return [BitChromosome(value, chromosome_length) for value in values]
+
+    def _single_point_crossover(self, chr1, chr2, crossover_point):
+        """Yield 2 offspring of 2 parent chromosomes using crossover operator"""
+        mask = chr1._mask(crossover_point, len(chr1))
+        yield chr1.splice(chr2, mask)
+        yield chr2.splice(chr1, mask)
+
+    def _two_point_crossover(self, chr1, chr2, crossover_1, crossover_2):
+        mask = chr1._mask(crossover_1, crossover_2)
+        yield chr1.splice(chr2, mask)
+        yield chr2.splice(chr1, mask)
+
+    def _fixed_common_feature_crossover(self, chr1, chr2):
+        differing = chr1.to_int() ^ chr2.to_int()
+        length = len(chr1)
+        yield chr1.splice(BitChromosome(self._random.getrandbits(length), length), differing)
+        yield chr1.splice(BitChromosome(self._random.getrandbits(length), length), differing)
+
+    def _mutate(self, chromosome):
+        """Flip a random bit of a chromosome with a given probability"""
+        if self._random.random() <= self.mutation_chance:
+            return chromosome.flip(self._random.randrange(0, len(chromosome)))
+        return chromosome
+
+    def _copy_chromosome(self, chromosome):
+        # BitChromosomes are immutable, so they can be shared between generations
+        return chromosome
+
+    def _to_chromosome(self, sequence):
+        return BitChromosome.from_bits(sequence)
+
+    def _changed_indices(self, parent, child):
+        return parent.changed_indices(child)
+
+    def _locus_counts(self, chromosomes):
+        """
+        Count the ones at every bit with bit-sliced adders: counters[level] holds bit `level` of the count
+        of every position, so each chromosome is added with a few whole-integer operations
+        """
+        counters = []
+        for chromosome in chromosomes:
+            carry = chromosome.to_int()
+            for level in range(len(counters)):
+                if not carry:
+                    break
+                counters[level], carry = counters[level] ^ carry, counters[level] & carry
+            if carry:
+                counters.append(carry)
+        length = self._chromosome_length
+        ones = [0] * length
+        for level, counter in enumerate(counters):
+            weight = 1 << level
+            for index, bit in enumerate(format(counter, "0{}b".format(length))):
+                if bit == "1":
+                    ones[index] += weight
+        population_size = len(chromosomes)
+        return [(count, population_size - count) for count in ones]
+
+    def _set_chromosomes(self, chromosome_list):
+        self._chromosomes = [BitChromosome.from_bits(chromosome) for chromosome in chromosome_list]
+        self._set_chromosome_lenth(len(self._chromosomes[0]))
+        self._clear_fitness_table()
+        self._generation_evaluations = 0
+
+    chromosomes = property(Population._get_chromosomes, _set_chromosomes)
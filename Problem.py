@@ -1,22 +1,192 @@
 import math
 
+from Genetic import bits_to_int, FitnessCache
+
+
+def binary_to_gray(value):
+    return value ^ (value >> 1)
+
+
+def gray_to_binary(value):
+    mask = value >> 1
+    while mask:
+        value ^= mask
+        mask >>= 1
+    return value
+
+
+class ParameterCodec():
+    """
+    The layout of a Problem's parameters in a chromosome: each parameter takes just enough bits to
+    index its options, one after another, optionally Gray coded so that neighbouring options differ
+    by a single bit. When the number of options is not a power of 2, some options get two codes and
+    the rest one; the bits are scaled onto the options rather than taken modulo their number, so the
+    doubled options are spread evenly across the range instead of all being the lowest ones.
+    The bias itself remains.
+    Decoding a chromosome is one conversion to an integer, then a shift, mask and lookup table per parameter.
+    """
+    # Parameters of up to this many bits are decoded with a lookup table
+    TABLE_BITS = 12
+
+    def __init__(self, parameters, gray_coding=False):
+        self._names = list(parameters)
+        self._options = [parameters[name] for name in self._names]
+        self._gray_coding = gray_coding
+        for name, options in zip(self._names, self._options):
+            if len(options) == 0:
+                raise ValueError("Parameter {} has no options.".format(name))
+        self._widths = [(len(options) - 1).bit_length() for options in self._options]
+        self._offsets = [sum(self._widths[:index]) for index in range(0, len(self._widths))]
+        self._length = sum(self._widths)
+        self._tables = [[options[self._index(raw, width, len(options))] for raw in range(0, 1 << width)]
+                        if width <= self.TABLE_BITS else None
+                        for options, width in zip(self._options, self._widths)]
+
+    def _index(self, raw, width, number_of_options):
+        """Return the option index that the raw bits of a parameter select"""
+        if self._gray_coding:
+            raw = gray_to_binary(raw)
+        return (raw * number_of_options) >> width
+
+    def _raw(self, index, width, number_of_options):
+        """Return the smallest raw bits of a parameter that select a given option index"""
+        raw = -(-(index << width) // number_of_options)
+        return binary_to_gray(raw) if self._gray_coding else raw
+
+    def _parameter_value(self, parameter_index, raw):
+        table = self._tables[parameter_index]
+        if table is not None:
+            return table[raw]
+        options = self._options[parameter_index]
+        return options[self._index(raw, self._widths[parameter_index], len(options))]
+
+    def decode(self, chromosome):
+        """Return {parameter name: option} for a chromosome. Any bits after the parameters are ignored."""
+        if len(chromosome) < self._length:
+            raise ValueError("Chromosome must have at least {} bits.".format(self._length))
+        value = bits_to_int(chromosome) >> (len(chromosome) - self._length)
+        decoded = {}
+        for parameter_index, (name, offset, width) in enumerate(zip(self._names, self._offsets, self._widths)):
+            raw = (value >> (self._length - offset - width)) & ((1 << width) - 1)
+            decoded[name] = self._parameter_value(parameter_index, raw)
+        return decoded
+
+    def decode_parameter(self, name, bits):
+        """Return the option selected by the bits of a single parameter"""
+        parameter_index = self._names.index(name)
+        width = self._widths[parameter_index]
+        return self._parameter_value(parameter_index, bits_to_int(bits[:width]) if width else 0)
+
+    def decode_population(self, chromosomes):
+        """
+        Decode every row of a population matrix at once, returning {parameter name: array of options}.
+        Requires numpy.
+        """
+        import numpy as np
+        chromosomes = np.asarray(chromosomes, dtype=np.int64)
+        if chromosomes.ndim != 2 or chromosomes.shape[1] < self._length:
+            raise ValueError("Chromosomes must be rows of at least {} bits.".format(self._length))
+        decoded = {}
+        for parameter_index, (name, offset, width) in enumerate(zip(self._names, self._offsets, self._widths)):
+            if width > 62:
+                raws = [bits_to_int(row) for row in chromosomes[:, offset:offset + width].tolist()]
+            else:
+                raws = chromosomes[:, offset:offset + width] @ (np.int64(1) << np.arange(width - 1, -1, -1, dtype=np.int64))
+            table = self._tables[parameter_index]
+            if table is not None:
+                decoded[name] = np.asarray(table)[raws]
+            else:
+                decoded[name] = np.asarray([self._parameter_value(parameter_index, raw) for raw in np.asarray(raws).tolist()])
+        return decoded
+
+    def decode_genes(self, genes):
+        """Return {parameter name: option} for a chromosome of option indices, one gene per parameter"""
+        return {name: options[gene] for name, options, gene in zip(self._names, self._options, genes)}
+
+    def encode(self, choices):
+        """Return the bits that select the given {parameter name: option}"""
+        value = 0
+        for name, options, width in zip(self._names, self._options, self._widths):
+            value = (value << width) | self._raw(options.index(choices[name]), width, len(options))
+        return [(value >> shift) & 1 for shift in range(self._length - 1, -1, -1)]
+
+    def split(self, chromosome):
+        """Return {parameter name: bits} for a chromosome"""
+        return {name: chromosome[offset:offset + width]
+                for name, offset, width in zip(self._names, self._offsets, self._widths)}
+
+    def _get_length(self):
+        return self._length
+
+    def _get_offsets(self):
+        return dict(zip(self._names, self._offsets))
+
+    def _get_widths(self):
+        return dict(zip(self._names, self._widths))
+
+    length = property(_get_length)
+    offsets = property(_get_offsets)
+    widths = property(_get_widths)
+
 
 class Problem():
-    def __init__(self):
+    """
+    A problem described by named parameters, each with a list of options.
+    Given a score function over the decoded parameter values, e.g score({"angle": 45, "power": 100}),
+    a Problem can be used directly as a Population's fitness function: each chromosome is decoded
+    and scored, and scores are cached by decoded values, since many chromosomes decode to the same values.
+    cache_size limits the score cache (None for unbounded, 0 for no cache).
+    """
+
+    def __init__(self, score_function=None, gray_coding=False, cache_size=10000):
         self.parameters = {}
+        self._score_function = score_function
+        self._score_cache = None if cache_size == 0 else FitnessCache(cache_size)
+        self._score_evaluations = 0
+        self._gray_coding = gray_coding
+        self._codec = ParameterCodec(self.parameters, gray_coding)
+
+    def __call__(self, chromosome):
+        """Return the score of a chromosome, reusing the score of previously seen parameter values"""
+        return self._score_values(self._codec.decode(chromosome))
+
+    def score_genes(self, genes):
+        """
+        Return the score of a chromosome of integer genes, one per parameter, each the index of an option.
+        Use with an IntegerPopulation, e.g IntegerPopulation.set_problem(problem).
+        """
+        return self._score_values(self.decode_genes(genes))
+
+    def _score_values(self, values):
+        if self._score_cache is None:
+            self._score_evaluations += 1
+            return self.get_score(values)
+        key = tuple(values.values())
+        try:
+            score = self._score_cache.get(key)
+        except TypeError:
+            # Unhashable parameter values can't be cached
+            self._score_evaluations += 1
+            return self.get_score(values)
+        if score is None:
+            self._score_evaluations += 1
+            score = self.get_score(values)
+            self._score_cache.add(key, score)
+        return score
 
     def bitlist_to_int(self, bitlist, min_value=0, max_value=math.inf):
         """
         Convert a bitlist to an integer.
         e.g [0,1,0,1,1] -> 11
         """
-        return min_value + int(int("".join([str(x) for x in bitlist]), 2) % max_value)
+        return min_value + int(bits_to_int(bitlist) % max_value)
 
     def add_parameter(self, name, option_list):
         """
         Add a parameter to the problems parameter list
         """
         self.parameters[name] = option_list
+        self._codec = ParameterCodec(self.parameters, self._gray_coding)
 
     def get_bitlist(self, param=None):
         """
@@ -24,15 +194,37 @@ class Problem():
         If a parameter is supplied, simply provide bitlist for that param.
         """
         if param:
-            return [0 for i in range((len(self.parameters[param])-1).bit_length())]
+            return [0 for i in range(self._codec.widths[param])]
         else:
-            return [0 for i in range(0, sum([(len(self.parameters[param])-1).bit_length() for param in self.parameters]))]
+            return [0 for i in range(0, self._codec.length)]
+
+    def decode(self, chromosome):
+        """
+        Return the value of every parameter encoded in a chromosome, as a dict.
+        e.g {"angle": 45, "power": 100}
+        """
+        return self._codec.decode(chromosome)
+
+    def decode_population(self, chromosomes):
+        """Return the value of every parameter for every row of a population matrix, as a dict of arrays"""
+        return self._codec.decode_population(chromosomes)
+
+    def decode_genes(self, genes):
+        """Return the value of every parameter for a chromosome of option indices, as a dict"""
+        return self._codec.decode_genes(genes)
+
+    def encode(self, choices):
+        """Return the bitlist for the given parameter values, e.g to seed a population with a known solution"""
+        return self._codec.encode(choices)
 
     def get_score(self, param_values):
         """
-        get the score when given values for parameters?
+        Get the score when given values for parameters, as a dict.
+        Uses the score function, or can be overridden by a subclass instead.
         """
-        pass
+        if self._score_function is None:
+            raise NotImplementedError("Problem has no score function.")
+        return self._score_function(param_values)
 
     def get_parameter_value(self, param_name, index):
         """
@@ -41,37 +233,77 @@ class Problem():
         if type(index) == int:
             return self.parameters[param_name][index % (len(self.parameters[param_name]))]
         elif type(index) == list:
-            index = self.bitlist_to_int(
-                index, min_value=0, max_value=len(self.parameters[param_name]))
-            return self.parameters[param_name][index % (len(self.parameters[param_name]))]
+            return self._codec.decode_parameter(param_name, index)
 
+    def _get_gray_coding(self):
+        return self._gray_coding
 
-if __name__ == "__main__":
-    cannonball_problem = Problem()
-    cannonball_problem.add_parameter("angle", range(0, 181))
-    cannonball_problem.add_parameter("power", range(0, 101))
+    def _set_gray_coding(self, gray_coding):
+        self._gray_coding = gray_coding
+        self._codec = ParameterCodec(self.parameters, gray_coding)
 
-    choices = {
-        "angle": 45,
-        "power": 100,
-    }
+    def _get_codec(self):
+        return self._codec
 
-    def cannonball_distance(problem, choices):
-        g = 9.8  # gravity
+    def _get_score_function(self):
+        return self._score_function
+
+    def _set_score_function(self, score_function):
+        self._score_function = score_function
+        if self._score_cache is not None:
+            self._score_cache.clear()
 
-        angle = 0
-        angle = problem.get_parameter_value("angle", choices["angle"])
-        velocity = problem.get_parameter_value("power", choices["power"])
-        print("Angle = {}".format(angle))
-        print("Velocity = {}".format(velocity))
+    def _get_score_cache(self):
+        return self._score_cache
 
-        angle = math.radians(angle)
+    def _get_score_evaluations(self):
+        """Number of times the score function has been called"""
+        return self._score_evaluations
+
+    def _get_chromosome_length(self):
+        return self._codec.length
+
+    def _get_gene_ranges(self):
+        """The inclusive range of option indices of each parameter, for an IntegerPopulation"""
+        return [(0, len(self.parameters[name]) - 1) for name in self.parameters]
+
+    gray_coding = property(_get_gray_coding, _set_gray_coding)
+    codec = property(_get_codec)
+    score_function = property(_get_score_function, _set_score_function)
+    score_cache = property(_get_score_cache)
+    score_evaluations = property(_get_score_evaluations)
+    chromosome_length = property(_get_chromosome_length)
+    gene_ranges = property(_get_gene_ranges)
+
+
+if __name__ == "__main__":
+    from Genetic import Population, BreakCondition
+
+    def cannonball_distance(choices):
+        g = 9.8  # gravity
+
+        angle = math.radians(choices["angle"])
+        velocity = choices["power"]
 
         distance_launched = (velocity*velocity * math.sin(2 * angle)) / g
-        print("Distance = {}".format(distance_launched))
         if distance_launched <= 0:
             return 0
         else:
             return distance_launched
 
-    cannonball_distance(cannonball_problem, choices)
+    cannonball_problem = Problem(cannonball_distance)
+    cannonball_problem.add_parameter("angle", range(0, 181))
+    cannonball_problem.add_parameter("power", range(0, 101))
+
+    pop = Population(seed=1)
+    pop.chromosomes = pop.generate_random_sample(50, cannonball_problem.chromosome_length)
+    pop.fitness_function = cannonball_problem
+    pop.set_break_condition(BreakCondition.GENERATION, 50)
+    pop.simulate(echo=True, plot=False)
+
+    best_choices = cannonball_problem.decode(pop.fittest_chromosome[0])
+    print("Angle = {}".format(best_choices["angle"]))
+    print("Velocity = {}".format(best_choices["power"]))
+    print("Distance = {}".format(pop.fittest_chromosome[1]))
+    print("{} chromosomes scored with {} calls of the score function".format(
+        pop.total_evaluations, cannonball_problem.score_evaluations))
@@ -0,0 +1,98 @@
+"""
+Run a grid of genetic algorithm settings in parallel, e.g every selection x crossover method.
+
+    grid = make_grid(selection_method=list(SelectionMethod), crossover_method=list(CrossoverMethod), seed=[1, 2, 3])
+    for result in run_sweep(problems.knapsack, grid, population_size=50, chromosome_length=500, generations=100):
+        print(result["selection_method"], result["crossover_method"], result["best_fitness"])
+"""
+import csv
+import itertools
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from enum import Enum
+
+from Genetic import Population, BreakCondition
+
+RUN_SETTINGS = ("population_size", "chromosome_length", "generations", "seed")
+
+
+def make_grid(**options):
+    """Return a list of settings dicts, one for every combination of the given option lists"""
+    names = list(options)
+    return [dict(zip(names, values)) for values in itertools.product(*[options[name] for name in names])]
+
+
+def check_settings(settings, population_class=Population):
+    """Raise a KeyError for a setting that is neither a run setting nor a property of the population class"""
+    for name in settings:
+        if name not in RUN_SETTINGS and not isinstance(getattr(population_class, name, None), property):
+            raise KeyError("{} is not a Population property.".format(name))
+
+
+def run_single(fitness_function, settings, chromosomes=None, population_class=Population):
+    """
+    Run one simulation with the given settings and return a result dict: the settings plus
+    max_fitnesses, avg_fitnesses, best_fitness, final_avg_fitness, evaluations and seconds.
+    """
+    check_settings(settings, population_class)
+    start = time.perf_counter()
+    pop = population_class(seed=settings.get("seed"))
+    if chromosomes is None:
+        chromosomes = pop.generate_random_sample(settings["population_size"], settings["chromosome_length"])
+    pop.chromosomes = chromosomes
+    pop.fitness_function = fitness_function
+    for name, value in settings.items():
+        if name not in RUN_SETTINGS:
+            setattr(pop, name, value)
+    pop.set_break_condition(BreakCondition.GENERATION, settings["generations"])
+    max_fitnesses, avg_fitnesses = pop.simulate(echo=False, plot=False)
+
+    result = dict(settings)
+    # Record the size of the population that was actually run, which may have been given as chromosomes
+    result.update({"population_size": len(pop.chromosomes),
+                   "chromosome_length": len(pop.chromosomes[0]),
+                   "max_fitnesses": max_fitnesses,
+                   "avg_fitnesses": avg_fitnesses,
+                   "best_fitness": pop.fittest_chromosome[1],
+                   "final_avg_fitness": pop.average_fitness,
+                   "evaluations": pop.total_evaluations,
+                   "seconds": time.perf_counter() - start})
+    return result
+
+
+def run_sweep(fitness_function, grid, population_size=50, chromosome_length=100, generations=100,
+              chromosomes=None, max_workers=None, population_class=Population):
+    """
+    Run every settings dict of a grid on a process pool, yielding each result as soon as it finishes.
+    population_size, chromosome_length and generations are defaults for runs that do not set them.
+    If chromosomes are given, every run starts from that same population, and its size is recorded in the results.
+    The fitness function must be picklable, e.g a module level function or an ExampleProblems method.
+    Raises a KeyError before running anything if a grid setting is not a Population property.
+    """
+    grid = list(grid)
+    # Check every run before starting any, so a misspelt setting fails at once rather than in a worker
+    for settings in grid:
+        check_settings(settings, population_class)
+    defaults = {"population_size": population_size, "chromosome_length": chromosome_length, "generations": generations}
+    if chromosomes is not None:
+        chromosomes = [list(chromosome) for chromosome in chromosomes]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(run_single, fitness_function, dict(defaults, **settings), chromosomes, population_class)
+                   for settings in grid]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def write_results_table(results, path):
+    """Write one CSV row per run: its settings and summary statistics (not the per-generation lists)"""
+    results = list(results)
+    columns = []
+    for result in results:
+        for name in result:
+            if name not in columns and name not in ("max_fitnesses", "avg_fitnesses"):
+                columns.append(name)
+    with open(path, "w", newline="") as table_file:
+        writer = csv.DictWriter(table_file, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        for result in results:
+            writer.writerow({name: value.value if isinstance(value, Enum) else value for name, value in result.items()})